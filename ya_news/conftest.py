@@ -0,0 +1 @@
+pytest_plugins = ('yanews.pytest_query_budget',)
@@ -1,15 +1,155 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.db.models import QuerySet
+from django.forms.models import BaseInlineFormSet
+from django.http import QueryDict
+from django.utils import timezone
 
 from .models import Comment, News
+from .pagination import KeysetPaginator
+
+AFTER_PARAM = 'comments_after'
+BEFORE_PARAM = 'comments_before'
+
+
+class DateSeekQuerySet(QuerySet):
+    """
+    Выборка, у которой datetimes() не просматривает все строки.
+
+    Иерархия дат в админке строится запросом DISTINCT по функции
+    усечения даты, которую SQLite вызывает для каждой строки.
+    Здесь каждый следующий год, месяц или день находится одним
+    поиском по индексу поля, так что число запросов равно числу
+    ссылок в иерархии, а не числу комментариев.
+    """
+    seek_kinds = ('year', 'month', 'day')
+
+    def datetimes(
+        self, field_name, kind, order='ASC', tzinfo=None, is_dst=None
+    ):
+        if kind not in self.seek_kinds:
+            return super().datetimes(
+                field_name, kind, order, tzinfo, is_dst
+            )
+        tzinfo = tzinfo or timezone.get_current_timezone()
+        values = self.order_by(field_name).values_list(
+            field_name, flat=True
+        )
+        result = []
+        value = values.first()
+        while value is not None:
+            start = self._truncate(
+                timezone.localtime(value, tzinfo), kind
+            )
+            result.append(timezone.make_aware(start, tzinfo, is_dst))
+            value = values.filter(**{
+                f'{field_name}__gte': timezone.make_aware(
+                    self._next(start, kind), tzinfo, is_dst
+                )
+            }).first()
+        return result if order == 'ASC' else result[::-1]
+
+    @staticmethod
+    def _truncate(value, kind):
+        """Начало года, месяца или дня без часового пояса."""
+        value = value.replace(
+            hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+        )
+        if kind == 'day':
+            return value
+        if kind == 'month':
+            return value.replace(day=1)
+        return value.replace(month=1, day=1)
+
+    @staticmethod
+    def _next(start, kind):
+        if kind == 'day':
+            return start + timedelta(days=1)
+        if kind == 'month':
+            return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return start.replace(year=start.year + 1)
+
+
+class CommentInlineFormSet(BaseInlineFormSet):
+    """
+    Комментарии новости выводятся постранично, новые сначала.
 
+    Страница выбирается курсорами KeysetPaginator, поэтому у новости
+    с сотней тысяч комментариев форма строится только для одной
+    страницы, а переход дальше не требует OFFSET.
+    """
+    ordering = ('-created', '-id')
+    per_page = 50
+    params = QueryDict()
 
-class CommentInline(admin.StackedInline):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        paginator = KeysetPaginator(
+            self.queryset, self.ordering, self.per_page
+        )
+        self.page = paginator.page(
+            after=self.params.get(AFTER_PARAM),
+            before=self.params.get(BEFORE_PARAM),
+        )
+        self.queryset = self.queryset.filter(
+            pk__in=[comment.pk for comment in self.page.object_list]
+        ).order_by(*self.ordering)
+        self.previous_link = self.page_link(
+            BEFORE_PARAM, self.page.previous_cursor
+        )
+        self.next_link = self.page_link(AFTER_PARAM, self.page.next_cursor)
+
+    def page_link(self, name, cursor):
+        """Ссылка на соседнюю страницу с остальными параметрами адреса."""
+        if cursor is None:
+            return None
+        params = self.params.copy()
+        params.pop(AFTER_PARAM, None)
+        params.pop(BEFORE_PARAM, None)
+        params[name] = cursor
+        return f'?{params.urlencode()}'
+
+
+class CommentInline(admin.TabularInline):
     model = Comment
+    formset = CommentInlineFormSet
+    template = 'admin/news/comment_inline.html'
     extra = 0
+    fields = ('author', 'text', 'flagged', 'created')
+    readonly_fields = ('author', 'created')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('author')
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.params = request.GET
+        return formset
+
+    def has_add_permission(self, request, obj=None):
+        """Новые комментарии добавляются через CommentAdmin."""
+        return False
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    list_display = ('title', 'date', 'comment_count')
+    show_full_result_count = False
     inlines = [
         CommentInline,
     ]
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'news', 'author', 'created', 'flagged')
+    list_select_related = ('news', 'author')
+    raw_id_fields = ('news', 'author')
+    date_hierarchy = 'created'
+    ordering = ('-created', '-id')
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return DateSeekQuerySet(queryset.model, queryset.query, queryset.db)
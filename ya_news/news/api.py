@@ -0,0 +1,138 @@
+"""
+Только для чтения: JSON-лента и NDJSON-выгрузка новостей и комментариев.
+
+Лента отдаёт записи в порядке изменения (modified, id): потребитель
+запоминает курсор next и забирает только то, что изменилось с прошлого
+раза. Удаления в ленту не попадают, их видно по полной выгрузке.
+"""
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views import generic
+
+from .models import Comment, News
+from .pagination import KeysetPaginator
+
+
+class InvalidParameter(ValueError):
+    pass
+
+
+class ApiMixin:
+    """Общие поля и фильтр updated_since ленты и выгрузки."""
+    model = None
+    fields = ()
+
+    def get_queryset(self):
+        queryset = self.model.objects.all()
+        since = self.request.GET.get('updated_since')
+        if since:
+            value = parse_datetime(since)
+            if value is None:
+                raise InvalidParameter(
+                    'updated_since должен быть датой и временем ISO 8601.'
+                )
+            queryset = queryset.filter(modified__gte=value)
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return self.render(self.get_queryset())
+        except InvalidParameter as error:
+            return JsonResponse({'error': str(error)}, status=400)
+
+
+class NewsApiMixin(ApiMixin):
+    model = News
+    fields = (
+        'id', 'title', 'text', 'date', 'comment_count',
+        'last_comment_at', 'modified',
+    )
+
+
+class CommentApiMixin(ApiMixin):
+    model = Comment
+    fields = (
+        'id', 'news_id', 'author__username', 'text', 'created',
+        'modified', 'flagged',
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        news = self.request.GET.get('news')
+        if news:
+            if not news.isdigit():
+                raise InvalidParameter('news должен быть id новости.')
+            queryset = queryset.filter(news_id=news)
+        return queryset
+
+
+class FeedView(generic.View):
+    """Страница ленты с курсором на следующую."""
+    ordering = ('modified', 'id')
+    query_budget = 4
+
+    def render(self, queryset):
+        paginator = KeysetPaginator(
+            queryset.values(*self.fields),
+            self.ordering,
+            settings.NEWS_API_PAGE_SIZE,
+        )
+        page = paginator.page(after=self.request.GET.get('after'))
+        return JsonResponse({
+            'results': list(page.object_list),
+            'next': page.next_cursor,
+        })
+
+
+class ExportView(generic.View):
+    """
+    Полная выгрузка в NDJSON, по одной записи в строке.
+
+    Строки читаются из базы пачками через iterator(), поэтому
+    в памяти никогда не оказывается вся таблица.
+    """
+
+    def render(self, queryset):
+        response = StreamingHttpResponse(
+            self.stream(queryset.order_by('id').values(*self.fields)),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        name = self.model._meta.model_name
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.ndjson"'
+        )
+        return response
+
+    def stream(self, queryset):
+        """Строки NDJSON, по одному куску ответа на пачку из базы."""
+        chunk_size = settings.NEWS_EXPORT_CHUNK_SIZE
+        lines = []
+        for row in queryset.iterator(chunk_size=chunk_size):
+            lines.append(
+                json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+            )
+            if len(lines) == chunk_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+
+class NewsFeed(NewsApiMixin, FeedView):
+    pass
+
+
+class CommentFeed(CommentApiMixin, FeedView):
+    pass
+
+
+class NewsExport(NewsApiMixin, ExportView):
+    pass
+
+
+class CommentExport(CommentApiMixin, ExportView):
+    pass
@@ -0,0 +1,55 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = 'news:generation'
+
+
+def get_page_cache():
+    """Кеш NEWS_PAGE_CACHE, общий для всех процессов."""
+    return caches[settings.NEWS_PAGE_CACHE]
+
+
+def get_generation():
+    """
+    Текущее поколение данных новостей.
+
+    Меняется при каждой записи в News или Comment, поэтому всё,
+    что закешировано под старым поколением, больше не читается.
+    """
+    cache = get_page_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """
+    Делает все закешированные страницы новостей устаревшими.
+
+    Новое поколение записывается, а не увеличивается: у файлового
+    кеша incr не атомарен, и одновременные сбросы из разных
+    процессов не должны сливаться в один.
+    """
+    get_page_cache().set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'news:page:{get_generation()}:{path}'
+
+
+def get_cached_page(key):
+    return get_page_cache().get(key)
+
+
+def set_cached_page(key, response):
+    get_page_cache().set(
+        key,
+        (response.content, response['Content-Type']),
+        settings.NEWS_PAGE_CACHE_TIMEOUT,
+    )
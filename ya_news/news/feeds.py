@@ -0,0 +1,173 @@
+"""
+Ленты RSS и Atom: последние новости и комментарии к новости.
+
+Готовое тело ленты хранится в кеше под версией её данных: общая
+лента зависит от id и modified своих записей, лента комментариев —
+от modified и comment_count своей новости. Поэтому комментарий
+пересобирает только ленту своей новости. В ленту попадают последние
+NEWS_FEED_ITEMS записей по индексу, так что сборка не зависит
+от размера таблиц.
+"""
+import hashlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from .models import Comment, News
+
+
+class LatestNewsFeed(Feed):
+    title = 'YaNews'
+    description = 'Последние новости YaNews.'
+
+    def link(self):
+        return reverse('news:home')
+
+    def cache_version(self, **kwargs):
+        """
+        Ключи и modified записей ленты, прочитанные по индексу.
+
+        Правка, новая новость или удаление в окне ленты меняют версию,
+        а удаление за его пределами ленту и не меняет.
+        """
+        return list(self.get_items().values_list('id', 'modified'))
+
+    def get_items(self):
+        return News.objects.order_by('-date', '-id')[
+            :settings.NEWS_FEED_ITEMS
+        ]
+
+    def items(self):
+        return self.get_items().only('title', 'text', 'date', 'modified')
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('news:detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.date, time.min))
+
+    def item_updateddate(self, item):
+        return item.modified
+
+
+class LatestNewsAtomFeed(LatestNewsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestNewsFeed.description
+
+
+class NewsCommentsFeed(Feed):
+
+    def cache_version(self, pk):
+        """Комментарии новости меняют её modified и comment_count."""
+        return News.objects.filter(pk=pk).values_list(
+            'modified', 'comment_count'
+        ).first()
+
+    def get_object(self, request, pk):
+        return get_object_or_404(News.objects.only('title'), pk=pk)
+
+    def title(self, obj):
+        return f'Комментарии: {obj.title}'
+
+    def description(self, obj):
+        return f'Новые комментарии к новости «{obj.title}».'
+
+    def link(self, obj):
+        return reverse('news:detail', args=(obj.pk,))
+
+    def items(self, obj):
+        return Comment.objects.filter(news=obj).select_related(
+            'author'
+        ).order_by('-created', '-id')[:settings.NEWS_FEED_ITEMS]
+
+    def item_title(self, item):
+        return f'{item.author.username}: {item.text[:50]}'
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        url = reverse('news:detail', args=(item.news_id,))
+        return f'{url}#comment-{item.pk}'
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.created
+
+    def item_updateddate(self, item):
+        return item.modified
+
+
+class NewsCommentsAtomFeed(NewsCommentsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def get_cached_feed(feed, request, **kwargs):
+    """
+    Тело, тип и ETag ленты: из кеша или только что собранные.
+
+    Результат запоминается в запросе, чтобы ETag и сама лента
+    читали версию из базы один раз.
+    """
+    if hasattr(request, 'cached_feed'):
+        return request.cached_feed
+    version = feed.cache_version(**kwargs)
+    if version is None:
+        # Новости нет: лента ответит 404.
+        return feed(request, **kwargs)
+    key = 'news:feed:' + hashlib.md5(
+        f'{version}:{request.get_full_path()}'.encode()
+    ).hexdigest()
+    cached = cache.get(key)
+    if cached is None:
+        response = feed(request, **kwargs)
+        content = response.content
+        cached = (
+            content,
+            response['Content-Type'],
+            hashlib.md5(content).hexdigest(),
+        )
+        cache.set(key, cached, settings.NEWS_PAGE_CACHE_TIMEOUT)
+    request.cached_feed = cached
+    return cached
+
+
+def cached_feed(feed_class):
+    """
+    Вью ленты с кешем и условными запросами.
+
+    ETag считается по телу ленты, поэтому агрегатор, у которого
+    лента уже есть, получает 304 после одного запроса версии.
+    """
+    feed = feed_class()
+
+    def etag(request, **kwargs):
+        return get_cached_feed(feed, request, **kwargs)[2]
+
+    @condition(etag_func=etag)
+    def view(request, **kwargs):
+        content, content_type, _ = get_cached_feed(feed, request, **kwargs)
+        return HttpResponse(content, content_type=content_type)
+
+    # Версия, новость и записи ленты.
+    view.query_budget = 3
+    return view
@@ -1,7 +1,11 @@
+from functools import lru_cache
+
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import ProfanityMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +14,24 @@ BAD_WORDS = (
 WARNING = 'Не ругайтесь!'
 
 
+def load_bad_words():
+    """Встроенные слова и слова из файла BAD_WORDS_FILE, по одному в строке."""
+    words = list(BAD_WORDS)
+    if settings.BAD_WORDS_FILE:
+        with open(settings.BAD_WORDS_FILE, encoding='utf-8') as file:
+            words.extend(
+                line.strip() for line in file
+                if line.strip() and not line.startswith('#')
+            )
+    return words
+
+
+@lru_cache(maxsize=None)
+def get_bad_words_matcher():
+    """Автомат собирается один раз на процесс."""
+    return ProfanityMatcher(load_bad_words())
+
+
 class CommentForm(ModelForm):
 
     class Meta:
@@ -19,8 +41,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if get_bad_words_matcher().find(text) is not None:
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,111 @@
+"""
+Очередь фоновых задач в таблице news_job, без внешнего брокера.
+
+Задача ставится в той же транзакции, что и запись, которая её
+породила, и становится видна воркеру (manage.py run_jobs) только
+после коммита. Воркер берёт пачку задач одного вида одним UPDATE,
+поэтому несколько воркеров не получат одну задачу дважды, и
+обрабатывает всю пачку одним вызовом обработчика. Упавшая пачка
+повторяется с растущей паузой, пока не кончатся попытки.
+"""
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import Job, News
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Регистрирует обработчик пачки задач: он получает список payload."""
+    def register(function):
+        HANDLERS[kind] = function
+        return function
+    return register
+
+
+def enqueue(kind, **payload):
+    """Ставит задачу в текущей транзакции."""
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def claim(batch_size, visibility_timeout):
+    """
+    Берёт до batch_size готовых задач того же вида, что и самая старая.
+
+    Задача, у которой кончились попытки, не выдаётся, даже если
+    её воркер упал и не успел снять её через fail().
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    ready = Job.objects.filter(
+        available_at__lte=now,
+        attempts__lt=settings.NEWS_JOB_MAX_ATTEMPTS,
+    ).order_by(
+        'available_at', 'id'
+    )
+    head = ready.values('kind')[:1]
+    ids = ready.filter(kind=Subquery(head)).values('pk')[:batch_size]
+    Job.objects.filter(pk__in=Subquery(ids)).update(
+        available_at=now + timedelta(seconds=visibility_timeout),
+        claimed_by=token,
+        attempts=F('attempts') + 1,
+    )
+    # Реплика может ещё не видеть UPDATE этого воркера.
+    return list(Job.objects.using('default').filter(claimed_by=token))
+
+
+def fail(jobs, error):
+    """Откладывает задачи на повтор или снимает их после последней попытки."""
+    now = timezone.now()
+    for job in jobs:
+        job.claimed_by = ''
+        job.last_error = error
+        if job.attempts >= settings.NEWS_JOB_MAX_ATTEMPTS:
+            job.available_at = None
+        else:
+            job.available_at = now + timedelta(
+                seconds=settings.NEWS_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        job.save(update_fields=('claimed_by', 'last_error', 'available_at'))
+
+
+def run_batch(jobs):
+    """Выполняет пачку задач одного вида; True, если успешно."""
+    try:
+        with transaction.atomic():
+            HANDLERS[jobs[0].kind]([job.payload for job in jobs])
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+    except Exception:
+        fail(jobs, traceback.format_exc())
+        return False
+    return True
+
+
+def run_pending(batch_size=100, visibility_timeout=60):
+    """Выполняет все готовые задачи; возвращает (выполнено, с ошибкой)."""
+    done = failed = 0
+    while True:
+        jobs = claim(batch_size, visibility_timeout)
+        if not jobs:
+            return done, failed
+        if run_batch(jobs):
+            done += len(jobs)
+        else:
+            failed += len(jobs)
+
+
+@handler('refresh_comment_stats')
+def refresh_comment_stats_job(payloads):
+    """Один пересчёт счётчиков для всех новостей пачки и сброс кеша."""
+    News.objects.filter(
+        pk__in={payload['news_id'] for payload in payloads}
+    ).refresh_comment_stats()
+    bump_generation()
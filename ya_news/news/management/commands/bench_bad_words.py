@@ -0,0 +1,68 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.forms import BAD_WORDS
+from news.moderation import ProfanityMatcher, normalize
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+SAMPLE_TEXT = (
+    'Очень интересная новость, спасибо автору! Жду продолжения, '
+    'хотя некоторые детали хотелось бы уточнить у первоисточника. '
+) * 4
+
+
+def random_words(count, seed=0):
+    generator = random.Random(seed)
+    return [
+        ''.join(generator.choices(ALPHABET, k=generator.randint(5, 12)))
+        for _ in range(count)
+    ] + list(BAD_WORDS)
+
+
+def naive_find(words, text):
+    """Прежняя проверка: по одному поиску подстроки на каждое слово."""
+    lowered_text = normalize(text)
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время проверки комментария автоматом и перебором '
+        'слов для словарей разного размера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000, 10000, 50000],
+        )
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{"слов":>8} {"узлов":>9} {"автомат, мкс":>14} '
+            f'{"перебор, мкс":>14}'
+        )
+        for size in options['sizes']:
+            words = random_words(size)
+            matcher = ProfanityMatcher(words)
+            normalized = [normalize(word) for word in words]
+            automaton = timeit.timeit(
+                lambda: matcher.find(SAMPLE_TEXT), number=repeat
+            )
+            naive = timeit.timeit(
+                lambda: naive_find(normalized, SAMPLE_TEXT), number=repeat
+            )
+            self.stdout.write(
+                f'{size:>8} {len(matcher):>9} '
+                f'{automaton / repeat * 1e6:>14.1f} '
+                f'{naive / repeat * 1e6:>14.1f}'
+            )
@@ -0,0 +1,213 @@
+import json
+import math
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news import urls
+from news.models import Comment, News
+from news.synthetic import TextGenerator, skewed_picker
+
+# Доля каждого маршрута в потоке запросов: (имя, метод) -> вес.
+MIX = {
+    ('home', 'GET'): 30,
+    ('detail', 'GET'): 30,
+    ('detail', 'POST'): 3,
+    ('search', 'GET'): 8,
+    ('edit', 'GET'): 2,
+    ('delete', 'GET'): 1,
+    ('rss', 'GET'): 5,
+    ('atom', 'GET'): 2,
+    ('comments_rss', 'GET'): 3,
+    ('comments_atom', 'GET'): 1,
+    ('api_news', 'GET'): 5,
+    ('api_comments', 'GET'): 5,
+    ('export_news', 'GET'): 0.05,
+    ('export_comments', 'GET'): 0.01,
+}
+
+
+class QueryCounter:
+    """Считает запросы ко всем базам, как QueryBudgetMiddleware."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = [latency for latency, _ in samples]
+    queries = [count for _, count in samples]
+    return {
+        'requests': len(samples),
+        'throughput': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_mean': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+    }
+
+
+class Traffic:
+    """Собирает запросы к маршрутам news.urls на данных из базы."""
+
+    def __init__(self, rng, skew, sample):
+        self.rng = rng
+        self.texts = TextGenerator(rng)
+        self.anonymous = Client(SERVER_NAME='localhost')
+        self.clients = {}
+        news = list(News.objects.order_by('-comment_count').values_list(
+            'pk', 'title'
+        )[:sample])
+        comments = list(Comment.objects.order_by('-pk').values_list(
+            'pk', 'author_id'
+        )[:sample])
+        if not news or not comments:
+            raise CommandError(
+                'Нет новостей или комментариев: запустите seed_data.'
+            )
+        self.pick_news = skewed_picker(news, skew, rng)
+        self.comments = comments
+        self.words = [word for _, title in news for word in title.split()]
+
+    def client_for(self, user_id):
+        if user_id not in self.clients:
+            client = Client(SERVER_NAME='localhost')
+            client.force_login(get_user_model().objects.get(pk=user_id))
+            self.clients[user_id] = client
+        return self.clients[user_id]
+
+    def request(self, name, method):
+        """Клиент, метод, адрес и аргументы одного запроса."""
+        news_id, _ = self.pick_news()[0]
+        comment_id, author_id = self.rng.choice(self.comments)
+        author = self.client_for(author_id)
+        reader = self.rng.choice((self.anonymous, author))
+        if name == 'detail' and method == 'POST':
+            return author, 'post', reverse(
+                'news:detail', args=(news_id,)
+            ), {'data': {'text': self.texts.text()}}
+        if name in ('detail', 'comments_rss', 'comments_atom'):
+            return reader, 'get', reverse(
+                f'news:{name}', args=(news_id,)
+            ), {}
+        if name in ('edit', 'delete'):
+            return author, 'get', reverse(
+                f'news:{name}', args=(comment_id,)
+            ), {}
+        if name == 'search':
+            return reader, 'get', reverse('news:search'), {
+                'data': {'q': self.rng.choice(self.words)}
+            }
+        if name == 'api_comments':
+            return self.anonymous, 'get', reverse('news:api_comments'), {
+                'data': {'news': news_id}
+            }
+        return reader, 'get', reverse(f'news:{name}'), {}
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет смесь запросов по всем маршрутам news.urls и выводит '
+        'пропускную способность, p50/p95/p99 и число запросов к базе '
+        'в JSON для сравнения релизов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--skew', type=float, default=1.1)
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=1000,
+            help='Сколько новостей и комментариев брать в работу.',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Файл для отчёта JSON.')
+
+    def handle(self, *args, **options):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        missing = names - {name for name, _ in MIX}
+        if missing:
+            raise CommandError(
+                'Нет веса в смеси для маршрутов: '
+                + ', '.join(sorted(missing))
+            )
+        rng = random.Random(options['seed'])
+        # Без отладочного журнала запросов и проверки бюджета,
+        # как на рабочем сервере. Все запросы идут с одного адреса,
+        # поэтому ограничение частоты записей тоже отключено.
+        with override_settings(
+            DEBUG=False, QUERY_BUDGET_ENABLED=False, THROTTLE_RATES={}
+        ):
+            traffic = Traffic(rng, options['skew'], options['sample'])
+            routes = rng.choices(
+                list(MIX),
+                weights=list(MIX.values()),
+                k=options['warmup'] + options['requests'],
+            )
+            for route in routes[:options['warmup']]:
+                self.send(traffic, *route)
+            samples = defaultdict(list)
+            statuses = defaultdict(Counter)
+            started = time.perf_counter()
+            for route in routes[options['warmup']:]:
+                status, latency, queries = self.send(traffic, *route)
+                samples[route].append((latency, queries))
+                statuses[route][status] += 1
+            elapsed = time.perf_counter() - started
+        report = {
+            'project': 'ya_news',
+            'seconds': round(elapsed, 3),
+            **summarize(
+                [sample for route in samples.values() for sample in route],
+                elapsed,
+            ),
+            'routes': {
+                f'{method} news:{name}': {
+                    **summarize(samples[name, method], elapsed),
+                    'statuses': dict(statuses[name, method]),
+                }
+                for name, method in sorted(samples)
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def send(self, traffic, name, method):
+        """Статус, длительность и число запросов к базе."""
+        client, verb, path, kwargs = traffic.request(name, method)
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            started = time.perf_counter()
+            response = getattr(client, verb)(path, **kwargs)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            latency = time.perf_counter() - started
+        return response.status_code, latency, counter.count
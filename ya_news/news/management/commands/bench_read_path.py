@@ -0,0 +1,141 @@
+import asyncio
+import importlib
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import clear_url_caches
+
+from news.models import News
+
+
+def use_async_views(enabled):
+    """Пересобирает маршруты с асинхронными или обычными вью."""
+    settings.NEWS_ASYNC_VIEWS = enabled
+    importlib.reload(importlib.import_module('news.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def summary(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (
+        f'{name:<6} {len(latencies) / elapsed:>10.0f} '
+        f'{p50 * 1000:>10.1f} {p99 * 1000:>10.1f}'
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и p99 чтения главной '
+        'страницы и страниц новостей через WSGI и ASGI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument(
+            '--wsgi-threads',
+            type=int,
+            default=8,
+            help='Потоков у WSGI-сервера, как у gunicorn --threads.',
+        )
+
+    def handle(self, *args, **options):
+        # Синхронное промежуточное ПО переводит ASGI-обработчик
+        # в один поток, поэтому отладочные настройки отключаем.
+        settings.DEBUG = False
+        settings.QUERY_BUDGET_ENABLED = False
+        ids = list(News.objects.values_list('pk', flat=True)[:50])
+        if not ids:
+            self.stderr.write('Нет новостей: загрузите данные в базу.')
+            return
+        paths = ['/'] + [f'/news/{pk}/' for pk in ids]
+        paths = [
+            paths[index % len(paths)] for index in range(options['requests'])
+        ]
+        concurrency = options['concurrency']
+        self.stdout.write(
+            f'{"путь":<6} {"запр./с":>10} {"p50, мс":>10} {"p99, мс":>10}'
+        )
+        use_async_views(False)
+        call = self.wsgi_caller(options['wsgi_threads'])
+        self.stdout.write(
+            asyncio.run(self.run_clients('WSGI', call, paths, concurrency))
+        )
+        use_async_views(True)
+        call = self.asgi_caller()
+        self.stdout.write(
+            asyncio.run(self.run_clients('ASGI', call, paths, concurrency))
+        )
+
+    async def run_clients(self, name, call, paths, concurrency):
+        """
+        Закрытая нагрузка: concurrency клиентов шлют запросы подряд.
+
+        Задержка считается с момента отправки запроса, то есть
+        включает ожидание свободного обработчика на сервере.
+        """
+        queue = iter(paths)
+        latencies = []
+
+        async def client():
+            for path in queue:
+                started = time.perf_counter()
+                await call(path)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return summary(name, latencies, time.perf_counter() - started)
+
+    def wsgi_caller(self, threads):
+        handler = WSGIHandler()
+        factory = RequestFactory(SERVER_NAME='localhost')
+        server = ThreadPoolExecutor(threads)
+
+        def handle(path):
+            environ = factory._base_environ(PATH_INFO=path)
+            b''.join(handler(environ, lambda status, headers: None))
+
+        async def call(path):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(server, handle, path)
+
+        return call
+
+    def asgi_caller(self):
+        application = get_asgi_application()
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            pass
+
+        async def call(path):
+            await application(
+                {
+                    'type': 'http',
+                    'asgi': {'version': '3.0'},
+                    'http_version': '1.1',
+                    'method': 'GET',
+                    'scheme': 'http',
+                    'path': path,
+                    'query_string': b'',
+                    'headers': [(b'host', b'localhost')],
+                    'server': ('localhost', 80),
+                    'client': ('127.0.0.1', 50000),
+                },
+                receive,
+                send,
+            )
+
+        return call
@@ -0,0 +1,119 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = (
+    'CREATE TABLE comment ('
+    'id INTEGER PRIMARY KEY, news_id INTEGER, text TEXT, created REAL)',
+    'CREATE INDEX comment_news_created ON comment (news_id, created, id)',
+)
+READ = (
+    'SELECT id, text FROM comment WHERE news_id = ? '
+    'ORDER BY created, id LIMIT 50'
+)
+WRITE = 'INSERT INTO comment (news_id, text, created) VALUES (?, ?, ?)'
+
+
+class Workload:
+    """Читатели и писатели работают с одним файлом базы заданное время."""
+
+    def __init__(self, path, pragmas, persistent, news_count=100):
+        self.path = path
+        self.pragmas = pragmas
+        self.persistent = persistent
+        self.news_count = news_count
+        self.lock = threading.Lock()
+        self.counts = {'read': 0, 'write': 0, 'busy': 0}
+
+    def connect(self):
+        # Пять секунд ожидания блокировки — как у Django по умолчанию.
+        connection = sqlite3.connect(self.path, timeout=5)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def worker(self, kind, deadline):
+        connection = self.connect() if self.persistent else None
+        done = busy = 0
+        index = 0
+        while time.monotonic() < deadline:
+            current = connection or self.connect()
+            news_id = index % self.news_count
+            try:
+                if kind == 'read':
+                    current.execute(READ, (news_id,)).fetchall()
+                else:
+                    with current:
+                        current.execute(
+                            WRITE, (news_id, 'Комментарий', time.time())
+                        )
+                done += 1
+            except sqlite3.OperationalError:
+                busy += 1
+            finally:
+                if connection is None:
+                    current.close()
+            index += 1
+        with self.lock:
+            self.counts[kind] += done
+            self.counts['busy'] += busy
+
+    def run(self, readers, writers, seconds):
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(target=self.worker, args=(kind, deadline))
+            for kind in ['read'] * readers + ['write'] * writers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {kind: count / seconds for kind, count in self.counts.items()}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает одновременные чтение и запись в SQLite с настройками '
+        'по умолчанию и с производственным профилем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        profiles = (
+            ('по умолчанию', {}, False),
+            ('production', settings.SQLITE_PRODUCTION_PRAGMAS, True),
+        )
+        self.stdout.write(
+            f'{"профиль":<14} {"чтений/с":>10} {"записей/с":>10} '
+            f'{"занято/с":>10}'
+        )
+        for name, pragmas, persistent in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                path = str(Path(directory) / 'bench.sqlite3')
+                self.prepare(path, options['rows'])
+                result = Workload(path, pragmas, persistent).run(
+                    options['readers'], options['writers'], options['seconds']
+                )
+            self.stdout.write(
+                f'{name:<14} {result["read"]:>10.0f} '
+                f'{result["write"]:>10.0f} {result["busy"]:>10.1f}'
+            )
+
+    def prepare(self, path, rows):
+        with sqlite3.connect(path) as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.executemany(
+                WRITE,
+                ((index % 100, 'Комментарий', index) for index in range(rows)),
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from news.search import FTS_TABLE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='После перестройки слить сегменты индекса в один.',
+        )
+
+    def handle(self, *args, **options):
+        rebuild_index(connection)
+        if options['optimize']:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+                )
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+            count, = cursor.fetchone()
+        self.stdout.write(f'Проиндексировано новостей: {count}')
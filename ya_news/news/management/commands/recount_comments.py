@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.cache import bump_generation
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько новостей обновлять за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = News.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                updated += News.objects.filter(
+                    pk__gte=batch[0], pk__lte=batch[-1]
+                ).refresh_comment_stats()
+            last_pk = batch[-1]
+        bump_generation()
+        self.stdout.write(f'Обновлено новостей: {updated}')
@@ -0,0 +1,140 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+
+from news.forms import load_bad_words
+from news.models import Comment
+from news.moderation import ProfanityMatcher
+
+_matcher = None
+
+
+def init_worker(words):
+    global _matcher
+    _matcher = ProfanityMatcher(words)
+
+
+def find_hits(rows):
+    """Возвращает id комментариев, в которых есть запрещённые слова."""
+    return [pk for pk, text in rows if _matcher.find(text) is not None]
+
+
+class Command(BaseCommand):
+    help = (
+        'Повторно проверяет сохранённые комментарии по текущему словарю '
+        'запрещённых слов и отмечает для проверки в админке '
+        'или удаляет найденные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--action',
+            choices=('flag', 'delete'),
+            default='flag',
+            help='Что делать с найденными комментариями.',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов; 0 — проверять в текущем процессе.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл, в котором запоминается последний проверенный id.',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Начать с начала, не читая контрольную точку.',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        last_pk = 0
+        if checkpoint and not options['reset']:
+            last_pk = self.read_checkpoint(checkpoint)
+        batch_size = options['batch_size']
+        workers = options['workers']
+        words = load_bad_words()
+        total = Comment.objects.filter(pk__gt=last_pk).count()
+        pool = None
+        if workers:
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                workers, initializer=init_worker, initargs=(words,)
+            )
+        else:
+            init_worker(words)
+        processed = found = 0
+        started = time.monotonic()
+        try:
+            while True:
+                rows = list(
+                    Comment.objects.filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .values_list('pk', 'text')[:batch_size]
+                    .iterator()
+                )
+                if not rows:
+                    break
+                hits = self.check_rows(rows, pool, workers)
+                if hits:
+                    self.apply(options['action'], hits)
+                last_pk = rows[-1][0]
+                processed += len(rows)
+                found += len(hits)
+                if checkpoint:
+                    self.write_checkpoint(checkpoint, last_pk)
+                rate = processed / max(time.monotonic() - started, 1e-9)
+                self.stdout.write(
+                    f'Проверено {processed} из {total}, найдено {found}, '
+                    f'{rate:.0f} комментариев/с'
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(f'Готово. Найдено комментариев: {found}')
+
+    def check_rows(self, rows, pool, workers):
+        if pool is None:
+            return find_hits(rows)
+        size = -(-len(rows) // workers)
+        chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+        return [pk for hits in pool.map(find_hits, chunks) for pk in hits]
+
+    def apply(self, action, hits):
+        """
+        Отмечает или удаляет найденные комментарии.
+
+        Отметка flagged — только пометка для проверки в админке:
+        на сайте и в лентах комментарий остаётся, поэтому страницы
+        новостей не меняются. modified комментария обновляется, чтобы
+        отметка попала в ленту API. Удаление идёт через сигналы
+        post_delete, которые пересчитывают счётчики и сбрасывают кеш.
+        """
+        comments = Comment.objects.filter(pk__in=hits)
+        if action == 'flag':
+            comments.update(flagged=True, modified=timezone.now())
+        else:
+            with transaction.atomic():
+                comments.delete()
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)['last_pk']
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, path, last_pk):
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'last_pk': last_pk}, file)
+        os.replace(temporary, path)
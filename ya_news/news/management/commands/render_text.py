@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from news.cache import bump_generation
+from news.models import Comment, News
+from news.rendering import backfill, make_excerpt, render_text_html
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново считает краткое содержание новостей и HTML комментариев, '
+        'например после загрузки строк в обход save().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк обновлять за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        news = backfill(News, 'excerpt', make_excerpt, batch_size)
+        comments = backfill(
+            Comment, 'text_html', render_text_html, batch_size
+        )
+        bump_generation()
+        self.stdout.write(
+            f'Обновлено новостей: {news}, комментариев: {comments}'
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.jobs import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди news_job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько задач одного вида выполнять за раз.',
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=60,
+            help='Через сколько секунд взятая задача вернётся в очередь, '
+                 'если воркер не успел её выполнить.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        try:
+            while True:
+                batch_done, batch_failed = run_pending(
+                    options['batch_size'], options['visibility_timeout']
+                )
+                done += batch_done
+                failed += batch_failed
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
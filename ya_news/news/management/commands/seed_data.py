@@ -0,0 +1,140 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.cache import bump_generation
+from news.models import Comment, News
+from news.rendering import make_excerpt, render_text_html
+from news.synthetic import TextGenerator, batched, skewed_picker
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями '
+        'и комментариями с неравномерной популярностью.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа для новостей и авторов.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней разбросать даты новостей.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--prefix', default='seed')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.texts = TextGenerator(self.rng)
+        self.batch_size = options['batch_size']
+        user_ids = self.create_users(options['users'], options['prefix'])
+        news_ids = self.create_news(options['news'], options['days'])
+        if options['comments']:
+            # Популярны случайные новости, а не обязательно новые.
+            news_ids = news_ids or list(
+                News.objects.values_list('pk', flat=True)
+            )
+            user_ids = user_ids or list(
+                get_user_model().objects.values_list('pk', flat=True)
+            )
+            self.rng.shuffle(news_ids)
+            self.rng.shuffle(user_ids)
+            self.create_comments(
+                options['comments'],
+                skewed_picker(news_ids, options['skew'], self.rng),
+                skewed_picker(user_ids, options['skew'], self.rng),
+            )
+            call_command(
+                'recount_comments',
+                batch_size=self.batch_size,
+                stdout=self.stdout,
+            )
+        bump_generation()
+
+    def insert(self, model, objects, total):
+        """Вставляет пачками, возвращает ключи новых строк."""
+        started = time.perf_counter()
+        last = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+        # bulk_create в SQLite не возвращает первичные ключи.
+        ids = list(model.objects.filter(pk__gt=last).values_list(
+            'pk', flat=True
+        ))
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {total} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
+        return ids
+
+    def create_users(self, count, prefix):
+        User = get_user_model()
+        start = User.objects.filter(username__startswith=prefix).count()
+        return self.insert(User, (
+            User(
+                username=f'{prefix}{start + index}',
+                password=make_password(None),
+            )
+            for index in range(count)
+        ), count)
+
+    def create_news(self, count, days):
+        max_length = News._meta.get_field('title').max_length
+        today = date.today()
+
+        def news():
+            # bulk_create не вызывает save(): готовим поля сами.
+            for _ in range(count):
+                text = self.texts.text(sentences=12)
+                yield News(
+                    title=self.texts.title(max_length),
+                    text=text,
+                    excerpt=make_excerpt(text),
+                    date=today - timedelta(days=self.rng.randrange(days)),
+                )
+
+        return self.insert(News, news(), count)
+
+    def create_comments(self, count, pick_news, pick_author):
+        def comments():
+            for batch in batched(range(count), self.batch_size):
+                for news_id, author_id in zip(
+                    pick_news(len(batch)), pick_author(len(batch))
+                ):
+                    text = self.texts.text()
+                    yield Comment(
+                        news_id=news_id,
+                        author_id=author_id,
+                        text=text,
+                        text_html=render_text_html(text),
+                    )
+
+        # Ключи комментариев не нужны: не держим их в памяти.
+        started = time.perf_counter()
+        for batch in batched(comments(), self.batch_size):
+            with transaction.atomic():
+                Comment.objects.bulk_create(batch)
+        self.stdout.write(
+            f'{Comment._meta.verbose_name_plural}: {count} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
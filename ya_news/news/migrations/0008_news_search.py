@@ -0,0 +1,69 @@
+from django.db import migrations
+
+
+def normalized(column):
+    """unicode61 не отождествляет «ё» и «е», поэтому это делает индекс."""
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def index_row(row):
+    return f"{row}.id, {normalized(f'{row}.title')}, {normalized(f'{row}.text')}"
+
+
+CREATE_INDEX = [
+    f"""
+    CREATE VIEW news_news_fts_content AS
+    SELECT id, {normalized('title')} AS title, {normalized('text')} AS text
+    FROM news_news
+    """,
+    """
+    CREATE VIRTUAL TABLE news_news_fts USING fts5(
+        title,
+        text,
+        content='news_news_fts_content',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    "INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')",
+    f"""
+    CREATE TRIGGER news_news_fts_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES ({index_row('new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER news_news_fts_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', {index_row('old')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER news_news_fts_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', {index_row('old')});
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES ({index_row('new')});
+    END
+    """,
+]
+
+DROP_INDEX = [
+    'DROP TRIGGER news_news_fts_update',
+    'DROP TRIGGER news_news_fts_delete',
+    'DROP TRIGGER news_news_fts_insert',
+    'DROP TABLE news_news_fts',
+    'DROP VIEW news_news_fts_content',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_news_modified_default'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
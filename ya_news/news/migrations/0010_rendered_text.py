@@ -0,0 +1,48 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+from news.rendering import backfill, make_excerpt, render_text_html
+
+
+def fill_rendered_text(apps, schema_editor):
+    backfill(apps.get_model('news', 'News'), 'excerpt', make_excerpt)
+    backfill(
+        apps.get_model('news', 'Comment'), 'text_html', render_text_html
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_comment_modified'),
+    ]
+
+    # ALTER TABLE ADD COLUMN вместо пересоздания таблиц: оно не копирует
+    # строки и не ломает представление поискового индекса новостей.
+    operations = [
+        migrations.RunSQL(
+            "ALTER TABLE news_comment "
+            "ADD COLUMN text_html text NOT NULL DEFAULT ''",
+            'ALTER TABLE news_comment DROP COLUMN text_html',
+            state_operations=[
+                migrations.AddField(
+                    model_name='comment',
+                    name='text_html',
+                    field=models.TextField(default='', editable=False),
+                ),
+            ],
+        ),
+        migrations.RunSQL(
+            "ALTER TABLE news_news ADD COLUMN excerpt text NOT NULL DEFAULT ''",
+            'ALTER TABLE news_news DROP COLUMN excerpt',
+            state_operations=[
+                migrations.AddField(
+                    model_name='news',
+                    name='excerpt',
+                    field=models.TextField(default='', editable=False),
+                ),
+            ],
+        ),
+        migrations.RunPython(fill_rendered_text, migrations.RunPython.noop),
+    ]
@@ -2,21 +2,85 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, FloatField, Max, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .rendering import make_excerpt, render_text_html
+from .search import FTS_TABLE, build_match_query
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def refresh_comment_stats(self):
+        """Пересчитывает счётчик и дату последнего комментария."""
+        comments = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news')
+        return self.update(
+            comment_count=Coalesce(
+                Subquery(comments.annotate(count=Count('pk')).values('count')),
+                0,
+            ),
+            last_comment_at=Subquery(
+                comments.annotate(last=Max('created')).values('last')
+            ),
+            modified=timezone.now(),
+        )
+
+    def search(self, text):
+        """
+        Новости, подходящие под поисковый запрос, с оценкой rank.
+
+        Чем меньше rank (bm25 от FTS5), тем выше новость в выдаче.
+        """
+        query = build_match_query(text)
+        queryset = self.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = news_news.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[query],
+        ).annotate(
+            rank=RawSQL(f'bm25({FTS_TABLE})', (), output_field=FloatField())
+        )
+        return queryset if query else queryset.none()
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
+    excerpt = models.TextField(editable=False, default='')
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
+    modified = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-id')
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+            models.Index(
+                fields=('modified', 'id'), name='news_modified_id_idx'
+            ),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.modified = timezone.now()
+        self.excerpt = make_excerpt(self.text)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -28,10 +92,75 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
+    text_html = models.TextField(editable=False, default='')
     created = models.DateTimeField(auto_now_add=True)
+    flagged = models.BooleanField('Отмечен модерацией', default=False)
+    modified = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('modified', 'id'), name='comment_modified_id_idx'
+            ),
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+            models.Index(
+                fields=('news', 'modified', 'id'),
+                name='comment_news_modified_idx',
+            ),
+            models.Index(
+                fields=('author', 'created', 'id'),
+                name='comment_author_created_idx',
+            ),
+            models.Index(
+                fields=('created', 'id'), name='comment_created_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def save(self, *args, **kwargs):
+        self.modified = timezone.now()
+        self.text_html = render_text_html(self.text)
+        super().save(*args, **kwargs)
+
+
+class Job(models.Model):
+    """
+    Фоновая задача очереди news.jobs.
+
+    Задачу можно взять, когда наступило available_at. Взятая задача
+    откладывается на время видимости: если обработчик упал вместе
+    с процессом, задача вернётся в очередь сама, пока не кончатся
+    попытки. Пустое available_at означает, что попытки кончились
+    и задача больше не выполняется.
+    """
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(null=True, default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('available_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('available_at', 'id'), name='job_available_idx'
+            ),
+            models.Index(
+                fields=('kind', 'available_at', 'id'),
+                name='job_kind_available_idx',
+            ),
+            models.Index(fields=('claimed_by',), name='job_claimed_by_idx'),
+        )
+        verbose_name_plural = 'Задачи'
+        verbose_name = 'Задача'
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk}'
@@ -0,0 +1,82 @@
+from collections import deque
+
+LOOKALIKES = str.maketrans({
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    'ё': 'е',
+})
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и кириллическим буквам."""
+    return text.lower().translate(LOOKALIKES)
+
+
+class ProfanityMatcher:
+    """
+    Автомат Ахо-Корасик по списку запрещённых слов.
+
+    Текст просматривается за один проход, и время проверки
+    не зависит от количества слов в словаре.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+        for word in words:
+            self._add(normalize(word.strip()))
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        node = 0
+        for char in word:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[node][char] = child
+            node = child
+        self._output[node] = word
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                if self._output[child] is None:
+                    self._output[child] = self._output[self._fail[child]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def find(self, text):
+        """Возвращает первое найденное слово или None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in normalize(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node] is not None:
+                return output[node]
+        return None
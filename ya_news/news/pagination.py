@@ -0,0 +1,134 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+
+@dataclass
+class KeysetPage:
+    """Страница выборки, ограниченная курсорами."""
+    object_list: QuerySet
+    has_next: bool
+    has_previous: bool
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по ключу сортировки вместо OFFSET.
+
+    Ключ задаётся полями сортировки, например ('-date', '-id'):
+    каждая страница начинается сразу после граничной записи,
+    поэтому стоимость запроса не зависит от номера страницы.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = ordering
+        self.per_page = per_page
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def encode(self, obj):
+        values = [str(value) for value in self._values(obj)]
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()
+        ).decode()
+
+    def decode(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.fields):
+                raise ValueError(cursor)
+            return [
+                self._get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError) as error:
+            raise Http404('Некорректный курсор страницы.') from error
+
+    def _get_field(self, name):
+        """Поле модели или аннотации, например оценки поиска."""
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def _seek(self, values, forward, inclusive=False):
+        """
+        Условие «строго после» (или «строго до») граничной записи.
+
+        Первое поле вынесено отдельным диапазоном, чтобы база
+        могла начать просмотр индекса прямо с границы.
+        """
+        condition = Q()
+        equal = {}
+        for name, field, value in zip(self.ordering, self.fields, values):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        if inclusive:
+            condition |= Q(**equal)
+        descending = self.ordering[0].startswith('-')
+        lookup = 'lte' if descending == forward else 'gte'
+        return Q(**{f'{self.fields[0]}__{lookup}': values[0]}) & condition
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или до курсора before."""
+        if before:
+            return self._page_before(self.decode(before))
+        queryset = self.queryset
+        if after:
+            queryset = queryset.filter(self._seek(self.decode(after), True))
+        object_list = queryset[:self.per_page]
+        items = list(object_list)
+        has_next = bool(items) and self.queryset.filter(
+            self._seek(self._values(items[-1]), True)
+        ).exists()
+        return self._make_page(
+            object_list, items, has_next, bool(after) and bool(items)
+        )
+
+    def _page_before(self, values):
+        reverse = [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+        previous = list(
+            self.queryset.filter(self._seek(values, False)).order_by(
+                *reverse
+            )[:self.per_page + 1]
+        )
+        if not previous:
+            return self.page()
+        first = previous[:self.per_page][-1]
+        object_list = self.queryset.filter(
+            self._seek(self._values(first), True, inclusive=True)
+        )[:self.per_page]
+        items = list(object_list)
+        return self._make_page(
+            object_list, items, True, len(previous) > self.per_page
+        )
+
+    def _values(self, obj):
+        """Значения ключа у объекта модели или у строки из values()."""
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def _make_page(self, object_list, items, has_next, has_previous):
+        return KeysetPage(
+            object_list=object_list,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self.encode(items[-1]) if has_next else None,
+            previous_cursor=self.encode(items[0]) if has_previous else None,
+        )
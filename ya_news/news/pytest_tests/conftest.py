@@ -3,12 +3,20 @@ from datetime import datetime, timedelta
 import pytest
 from django.test.client import Client
 from django.conf import settings
+from django.core.cache import caches
 from django.urls import reverse
 from django.utils import timezone
 
 from news.models import Comment, News
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш не должен переживать тест, в отличие от базы."""
+    for cache in caches.all():
+        cache.clear()
+
+
 @pytest.fixture
 def author(django_user_model):
     """Автор комментария"""
@@ -86,6 +94,11 @@ def url_reverse_home() -> str:
     return reverse('news:home')
 
 
+@pytest.fixture
+def url_reverse_search() -> str:
+    return reverse('news:search')
+
+
 @pytest.fixture
 def url_reverse_login() -> str:
     return reverse('users:login')
@@ -106,6 +119,11 @@ def url_reverse_detail(new) -> str:
     return reverse('news:detail', args=(new.pk,))
 
 
+@pytest.fixture
+def url_reverse_comments_feed(new) -> str:
+    return reverse('news:comments_atom', args=(new.pk,))
+
+
 @pytest.fixture
 def url_reverse_edit(comment) -> str:
     return reverse('news:edit', args=(comment.pk,))
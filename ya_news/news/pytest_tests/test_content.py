@@ -1,9 +1,24 @@
+import json
+import subprocess
+import sys
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from pytest_lazyfixture import lazy_fixture as lf
 
+from news.admin import CommentInlineFormSet, DateSeekQuerySet
 from news.forms import CommentForm
+from news.models import Comment, News
 
 
+FILTERS = '_changelist_filters=q%3D%D0%B0'
 pytestmark = pytest.mark.django_db
 
 
@@ -19,6 +34,168 @@ def test_news_count(
     assert news_count == settings.NEWS_COUNT_ON_HOME_PAGE
 
 
+def test_home_page_skips_comments(
+    ten_news,
+    many_comments,
+    url_reverse_home,
+    client,
+    django_assert_num_queries,
+) -> None:
+    """Тест на то, что главная страница не загружает комментарии."""
+    with django_assert_num_queries(2) as captured:
+        client.get(url_reverse_home)
+    for query in captured.captured_queries:
+        assert 'news_comment' not in query['sql']
+
+
+def test_news_keyset_pages(
+    ten_news,
+    url_reverse_home,
+    client,
+) -> None:
+    """Тест на переход по страницам новостей и обратно."""
+    first_page = client.get(url_reverse_home).context['page_obj']
+    assert first_page.has_next and not first_page.has_previous
+    response = client.get(
+        url_reverse_home, {'after': first_page.next_cursor}
+    )
+    second_page = response.context['page_obj']
+    assert len(response.context['object_list']) == 1
+    assert second_page.has_previous and not second_page.has_next
+    response = client.get(
+        url_reverse_home, {'before': second_page.previous_cursor}
+    )
+    assert (
+        list(response.context['object_list'])
+        == list(first_page.object_list)
+    )
+
+
+def test_search_keyset_pages(
+    ten_news,
+    url_reverse_search,
+    client,
+) -> None:
+    """Тест на переход по страницам результатов поиска."""
+    first_page = client.get(
+        url_reverse_search, {'q': 'НОВОСТЬ'}
+    ).context['page_obj']
+    assert len(first_page.object_list) == settings.NEWS_COUNT_ON_HOME_PAGE
+    response = client.get(
+        url_reverse_search, {'q': 'НОВОСТЬ', 'after': first_page.next_cursor}
+    )
+    assert len(response.context['object_list']) == 1
+    assert not response.context['page_obj'].has_next
+
+
+def test_search_ranks_matches(url_reverse_search, client) -> None:
+    """Тест на порядок результатов поиска и «ё» в запросе."""
+    News.objects.create(title='Погода', text='Туман и ёжики в тумане.')
+    best = News.objects.create(title='Ёжик', text='Ёжик в тумане.')
+    News.objects.create(title='Спорт', text='Без совпадений.')
+    response = client.get(url_reverse_search, {'q': 'еж туман'})
+    object_list = list(response.context['object_list'])
+    assert len(object_list) == 2
+    assert object_list[0] == best
+
+
+def test_comments_keyset_pages(
+    client,
+    url_reverse_detail,
+    many_comments,
+    settings,
+) -> None:
+    """Тест на постраничный вывод комментариев."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 4
+    seen = []
+    cursor = None
+    while True:
+        params = {'after': cursor} if cursor else {}
+        page = client.get(url_reverse_detail, params).context['comments_page']
+        seen.extend(page.object_list)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == list(Comment.objects.all())
+
+
+def test_home_page_served_from_cache(
+    ten_news,
+    url_reverse_home,
+    client,
+    django_assert_num_queries,
+) -> None:
+    """Тест на отдачу главной страницы из кеша без запросов к базе."""
+    first = client.get(url_reverse_home)
+    with django_assert_num_queries(0):
+        second = client.get(url_reverse_home)
+    assert second.content == first.content
+
+
+def test_home_page_cache_invalidated_by_write(
+    ten_news,
+    new,
+    author_client,
+    url_reverse_home,
+    url_reverse_detail,
+    client,
+) -> None:
+    """Тест на сброс кеша главной страницы после записи."""
+    client.get(url_reverse_home)
+    author_client.post(url_reverse_detail, data={'text': 'Новый текст'})
+    response = client.get(url_reverse_home)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+def test_home_page_cache_reset_by_other_process(
+    new, url_reverse_home, client
+) -> None:
+    """Тест на сброс кеша страниц из другого процесса, как у воркера."""
+    client.get(url_reverse_home)
+    News.objects.update(title='Новый заголовок')
+    subprocess.run(
+        [
+            sys.executable, 'manage.py', 'shell', '-c',
+            'from news.cache import bump_generation; bump_generation()',
+        ],
+        cwd=settings.BASE_DIR,
+        check=True,
+    )
+    assert 'Новый заголовок' in client.get(url_reverse_home).content.decode()
+
+
+@pytest.mark.parametrize(
+    'reverse_url', (lf('url_reverse_home'), lf('url_reverse_detail'))
+)
+def test_cached_auth_saves_two_queries(author, reverse_url, settings) -> None:
+    """Тест на сессию и пользователя из кеша: минус два запроса."""
+
+    def count_queries():
+        client = Client()
+        client.force_login(author)
+        client.get(reverse_url)
+        with CaptureQueriesContext(connection) as captured:
+            client.get(reverse_url)
+        return len(captured)
+
+    default = count_queries()
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.AUTH_USER_CACHE_ENABLED = True
+    assert count_queries() == default - 2
+
+
+def test_cached_user_forgotten_on_change(author, settings) -> None:
+    """Тест на сброс пользователя в кеше при смене пароля."""
+    settings.AUTH_USER_CACHE_ENABLED = True
+    client = Client()
+    client.force_login(author)
+    url = reverse('news:edit', args=(0,))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    author.set_password('новый пароль')
+    author.save()
+    assert client.get(url).status_code == HTTPStatus.FOUND
+
+
 def test_news_order(
     ten_news,
     url_reverse_home,
@@ -46,6 +223,44 @@ def test_comments_order(
     assert all_timestamps == sorted_timestamps
 
 
+def test_detail_not_modified(
+    client,
+    url_reverse_detail,
+    django_assert_num_queries,
+) -> None:
+    """Тест на ответ 304 без загрузки комментариев."""
+    response = client.get(url_reverse_detail)
+    with django_assert_num_queries(1):
+        not_modified = client.get(
+            url_reverse_detail, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    not_modified = client.get(
+        url_reverse_detail,
+        HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_detail_etag_changes(
+    client,
+    author_client,
+    reader_client,
+    comment,
+    url_reverse_detail,
+    url_reverse_edit,
+) -> None:
+    """Тест на смену ETag для другого пользователя и после правки."""
+    etag = author_client.get(url_reverse_detail)['ETag']
+    assert reader_client.get(url_reverse_detail)['ETag'] != etag
+    assert client.get(url_reverse_detail)['ETag'] != etag
+    author_client.post(url_reverse_edit, data={'text': 'Исправлено'})
+    response = author_client.get(
+        url_reverse_detail, HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
 def test_anonymous_client_has_no_form(
     client,
     url_reverse_detail,
@@ -63,3 +278,224 @@ def test_authorized_client_has_form(
     response = author_client.get(url_reverse_detail)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_news_feed_pages_and_updated_since(ten_news, client, settings) -> None:
+    """Тест на курсоры ленты новостей и фильтр updated_since."""
+    settings.NEWS_API_PAGE_SIZE = 4
+    url = reverse('news:api_news')
+    ids = []
+    params = {}
+    while True:
+        data = client.get(url, params).json()
+        ids.extend(row['id'] for row in data['results'])
+        if not data['next']:
+            break
+        params = {'after': data['next']}
+    assert sorted(ids) == sorted(News.objects.values_list('id', flat=True))
+    since = timezone.now()
+    changed = News.objects.first()
+    changed.save()
+    data = client.get(url, {'updated_since': since.isoformat()}).json()
+    assert [row['id'] for row in data['results']] == [changed.id]
+
+
+def test_comment_feed_filters_by_news(
+    many_comments, comment, client
+) -> None:
+    """Тест на ленту комментариев одной новости."""
+    News.objects.create(title='Другая', text='Без комментариев')
+    data = client.get(
+        reverse('news:api_comments'), {'news': comment.news_id}
+    ).json()
+    assert len(data['results']) == Comment.objects.count()
+    assert data['results'][0]['author__username'] == comment.author.username
+
+
+def test_feed_rejects_bad_updated_since(client) -> None:
+    """Тест на ответ 400 при некорректной дате."""
+    response = client.get(
+        reverse('news:api_news'), {'updated_since': 'вчера'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_comments_export_streams_ndjson(many_comments, client) -> None:
+    """Тест на потоковую выгрузку комментариев в NDJSON."""
+    response = client.get(reverse('news:export_comments'))
+    assert response.streaming
+    rows = [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+    assert [row['id'] for row in rows] == list(
+        Comment.objects.order_by('id').values_list('id', flat=True)
+    )
+
+
+@pytest.mark.parametrize('name', ('news:rss', 'news:atom'))
+def test_news_feed_cached_until_write(
+    name,
+    ten_news,
+    new,
+    author_client,
+    url_reverse_detail,
+    client,
+    django_assert_num_queries,
+) -> None:
+    """Тест на отдачу ленты из кеша и её пересборку после записи."""
+    url = reverse(name)
+    first = client.get(url)
+    assert first.content.decode().count(new.title) == 1
+    with django_assert_num_queries(1):
+        assert client.get(url).content == first.content
+    new.title = 'Новый заголовок'
+    new.save()
+    assert 'Новый заголовок' in client.get(url).content.decode()
+    new.delete()
+    assert 'Новый заголовок' not in client.get(url).content.decode()
+
+
+def test_comments_feed_not_modified(
+    many_comments,
+    comment,
+    client,
+    django_assert_num_queries,
+) -> None:
+    """Тест на ленту комментариев новости и ответ 304 по ETag."""
+    url = reverse('news:comments_rss', args=(comment.news_id,))
+    response = client.get(url)
+    assert f'#comment-{comment.pk}' in response.content.decode()
+    with django_assert_num_queries(1):
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    comment.text = 'Исправлено'
+    comment.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_feeds_rebuilt_only_for_changed_news(
+    comment,
+    author,
+    client,
+    django_assert_num_queries,
+) -> None:
+    """Тест на пересборку лент только у изменившейся новости."""
+    url = reverse('news:comments_rss', args=(comment.news_id,))
+    client.get(url)
+    other = News.objects.create(title='Другая', text='Текст')
+    Comment.objects.create(news=other, author=author, text='Чужой')
+    with django_assert_num_queries(1):
+        client.get(url)
+    assert 'Другая' in client.get(reverse('news:rss')).content.decode()
+    other.delete()
+    assert 'Другая' not in client.get(reverse('news:rss')).content.decode()
+
+
+def test_home_page_uses_excerpt(
+    client,
+    url_reverse_home,
+    django_assert_num_queries,
+) -> None:
+    """Тест на краткое содержание новости без чтения полного текста."""
+    news = News.objects.create(
+        title='Длинная', text=' '.join(f'слово{index}' for index in range(40))
+    )
+    with django_assert_num_queries(2) as captured:
+        content = client.get(url_reverse_home).content.decode()
+    assert news.excerpt in content
+    assert 'слово15' not in content
+    assert all(
+        '"news_news"."text"' not in query['sql']
+        for query in captured.captured_queries
+    )
+
+
+def test_comment_html_is_escaped(
+    comment,
+    client,
+    url_reverse_detail,
+) -> None:
+    """Тест на готовый экранированный HTML комментария."""
+    comment.text = '<b>жирный</b>\nвторая строка'
+    comment.save()
+    content = client.get(url_reverse_detail).content.decode()
+    assert '&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка' in content
+
+
+def test_admin_pages_news_comments(
+    new, many_comments, admin_client, monkeypatch
+) -> None:
+    """Тест на постраничные комментарии новости в админке."""
+    monkeypatch.setattr(CommentInlineFormSet, 'per_page', 4)
+    url = reverse('admin:news_news_change', args=(new.pk,))
+    newest = list(Comment.objects.order_by('-created', '-id'))
+    seen = []
+    link = f'?{FILTERS}'
+    while True:
+        response = admin_client.get(url + link)
+        formset = response.context['inline_admin_formsets'][0].formset
+        seen.extend(form.instance for form in formset.forms)
+        link = formset.next_link
+        if link is None:
+            break
+        assert FILTERS in link
+        assert escape(link) in response.content.decode()
+    assert seen == newest
+    assert formset.previous_link.startswith(f'?{FILTERS}&comments_before=')
+    assert len(formset.forms) == len(newest) % 4
+    changelist = admin_client.get(reverse('admin:news_news_changelist'))
+    assert f'<td class="field-comment_count">{len(newest)}</td>' in (
+        changelist.content.decode()
+    )
+
+
+@pytest.mark.no_query_budget
+def test_admin_comment_writes_update_news(
+    new, comment, author, admin_client, client, url_reverse_detail
+) -> None:
+    """Тест на счётчик и ETag новости после правок из админки."""
+    etag = client.get(url_reverse_detail)['ETag']
+    admin_client.post(reverse('admin:news_comment_add'), {
+        'news': new.pk, 'author': author.pk, 'text': 'Из админки',
+    })
+    new.refresh_from_db()
+    assert new.comment_count == 2
+    admin_client.post(
+        reverse('admin:news_comment_delete', args=(comment.pk,)),
+        {'post': 'yes'},
+    )
+    new.refresh_from_db()
+    assert new.comment_count == Comment.objects.count() == 1
+    response = client.get(url_reverse_detail, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert comment.text not in response.content.decode()
+    remaining = Comment.objects.get()
+    admin_client.post(reverse('admin:news_news_change', args=(new.pk,)), {
+        'title': new.title,
+        'text': new.text,
+        'date': new.date.isoformat(),
+        'comment_set-TOTAL_FORMS': 1,
+        'comment_set-INITIAL_FORMS': 1,
+        'comment_set-0-id': remaining.pk,
+        'comment_set-0-news': new.pk,
+        'comment_set-0-text': remaining.text,
+        'comment_set-0-DELETE': 'on',
+    })
+    assert not Comment.objects.exists()
+    new.refresh_from_db()
+    assert new.comment_count == 0
+    assert 'Комментариев' not in client.get(
+        reverse('news:home')
+    ).content.decode()
+
+
+@pytest.mark.parametrize('kind', ('year', 'month', 'day'))
+def test_date_hierarchy_seeks_dates(many_comments, kind) -> None:
+    """Тест на совпадение дат иерархии с выборкой через DISTINCT."""
+    queryset = Comment.objects.all()
+    seek = DateSeekQuerySet(Comment, queryset.query)
+    assert list(seek.datetimes('created', kind)) == list(
+        queryset.datetimes('created', kind)
+    )
@@ -1,11 +1,19 @@
+import json
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
 from django.contrib.auth import get_user
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
 from pytest_django.asserts import assertFormError, assertRedirects
 
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news import jobs, urls
+from news.models import Comment, Job, News
+from news.signals import apply_sqlite_pragmas
+from news.throttle import TokenBucket
 
 
 FORM_DATA: dict = {
@@ -58,6 +66,38 @@ def test_user_cant_use_bad_words(
     assertFormError(response, 'form', 'text', errors=WARNING)
 
 
+@pytest.mark.parametrize(
+    'text',
+    ('Ты похож на pедиcкa', 'НЕГОДЯЙ!', 'ты нeгoдяй'),
+)
+def test_bad_words_with_lookalike_letters(
+    author_client,
+    text: str,
+    url_reverse_detail,
+) -> None:
+    """Тест на запрет слов с латинскими буквами и в другом регистре."""
+    later_comments_count = Comment.objects.count()
+    response = author_client.post(url_reverse_detail, data={'text': text})
+    assert Comment.objects.count() == later_comments_count
+    assertFormError(response, 'form', 'text', errors=WARNING)
+
+
+def test_bad_words_from_file(
+    author_client,
+    url_reverse_detail,
+    settings,
+    tmp_path,
+) -> None:
+    """Тест на загрузку словаря из файла BAD_WORDS_FILE."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь\nхулиган\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    response = author_client.post(
+        url_reverse_detail, data={'text': 'Какой-то хулиган'}
+    )
+    assertFormError(response, 'form', 'text', errors=WARNING)
+
+
 def test_author_can_delete_comment(
     author_client,
     url_reverse_delete,
@@ -83,6 +123,95 @@ def test_user_cant_delete_comment_of_another_user(
     assert comments_count == later_comment_count
 
 
+def test_comment_count_follows_create_and_delete(
+    author_client,
+    url_reverse_detail,
+    url_reverse_delete,
+    comment,
+    new,
+) -> None:
+    """Тест на обновление счётчика комментариев новости."""
+    author_client.post(url_reverse_detail, data=FORM_DATA)
+    new.refresh_from_db()
+    assert new.comment_count == Comment.objects.filter(news=new).count()
+    assert new.last_comment_at == Comment.objects.latest('created').created
+    modified = new.modified
+    author_client.delete(url_reverse_delete)
+    new.refresh_from_db()
+    assert new.modified > modified
+    assert new.comment_count == Comment.objects.filter(news=new).count()
+    assert new.last_comment_at == Comment.objects.get().created
+
+
+def test_comment_count_follows_orm_writes(new, author) -> None:
+    """Тест на счётчик при записи комментариев в обход вью."""
+    first, second = (
+        Comment.objects.create(news=new, author=author, text=text)
+        for text in ('Первый', 'Второй')
+    )
+    new.refresh_from_db()
+    assert new.comment_count == 2
+    assert new.last_comment_at == second.created
+    second.delete()
+    new.refresh_from_db()
+    assert new.comment_count == 1
+    assert new.last_comment_at == first.created
+
+
+def test_recount_comments_command(
+    many_comments, new, client, url_reverse_home
+) -> None:
+    """Тест на восстановление счётчиков командой recount_comments."""
+    News.objects.update(comment_count=0, last_comment_at=None)
+    client.get(url_reverse_home)
+    call_command('recount_comments', batch_size=1)
+    new.refresh_from_db()
+    assert new.comment_count == Comment.objects.filter(news=new).count()
+    assert new.last_comment_at == Comment.objects.latest('created').created
+    content = client.get(url_reverse_home).content.decode()
+    assert f'Комментариев: {new.comment_count}' in content
+
+
+@pytest.mark.parametrize('workers', (0, 2))
+def test_remoderate_comments_flags_bad_words(
+    comment,
+    new,
+    author,
+    workers: int,
+    tmp_path,
+) -> None:
+    """Тест на повторную проверку сохранённых комментариев."""
+    bad_comment = Comment.objects.create(
+        news=new, author=author, text=f'Ты {BAD_WORDS[0]}'
+    )
+    checkpoint = tmp_path / 'checkpoint.json'
+    new.refresh_from_db()
+    call_command(
+        'remoderate_comments',
+        workers=workers,
+        batch_size=1,
+        checkpoint=str(checkpoint),
+    )
+    assert list(Comment.objects.filter(flagged=True)) == [bad_comment]
+    flagged = Comment.objects.get(flagged=True)
+    assert flagged.modified > bad_comment.modified
+    assert News.objects.get(pk=new.pk).modified == new.modified
+    Comment.objects.update(flagged=False)
+    call_command(
+        'remoderate_comments', checkpoint=str(checkpoint), workers=0
+    )
+    assert not Comment.objects.filter(flagged=True).exists()
+
+
+def test_remoderate_comments_deletes_bad_words(comment, new, author) -> None:
+    """Тест на удаление найденных комментариев со счётчиком."""
+    Comment.objects.create(news=new, author=author, text=BAD_WORDS[1])
+    call_command('remoderate_comments', action='delete', workers=0)
+    assert list(Comment.objects.all()) == [comment]
+    new.refresh_from_db()
+    assert new.comment_count == 1
+
+
 def test_author_can_edit_comment(
     author_client,
     url_reverse_detail,
@@ -111,3 +240,148 @@ def test_user_cant_edit_comment_of_another_user(
     assert new_comment.text == comment.text
     assert new_comment.author == comment.author
     assert new_comment.news == comment.news
+
+
+def test_search_index_follows_news(new) -> None:
+    """Тест на обновление поискового индекса вместе с новостью."""
+    new.title = 'Срочная новость'
+    new.save()
+    assert list(News.objects.search('срочная')) == [new]
+    assert not News.objects.search('заголовок').exists()
+    new.delete()
+    assert not News.objects.search('срочная').exists()
+    call_command('rebuild_search_index')
+    assert not News.objects.search('срочная').exists()
+
+
+def test_sqlite_pragmas_applied_to_new_connection(settings) -> None:
+    """Тест на настройку соединения SQLite из SQLITE_PRAGMAS."""
+    settings.SQLITE_PRAGMAS = {'cache_size': -32000}
+    apply_sqlite_pragmas(sender=connection.__class__, connection=connection)
+    with connection.cursor() as cursor:
+        assert cursor.execute('PRAGMA cache_size').fetchone() == (-32000,)
+
+
+def test_render_text_backfills_rows(new, comment) -> None:
+    """Тест на заполнение готовых полей у строк без них."""
+    News.objects.update(excerpt='')
+    Comment.objects.update(text_html='')
+    call_command('render_text', batch_size=1, stdout=StringIO())
+    new.refresh_from_db()
+    comment.refresh_from_db()
+    assert new.excerpt == new.text
+    assert comment.text_html == comment.text
+
+
+def test_seed_data_and_load_report(tmp_path) -> None:
+    """Тест на генерацию данных и отчёт нагрузки по маршрутам news.urls."""
+    call_command(
+        'seed_data', users=5, news=12, comments=60, seed=1, batch_size=7,
+        stdout=StringIO(),
+    )
+    assert News.objects.count() == 12
+    assert sum(
+        News.objects.values_list('comment_count', flat=True)
+    ) == Comment.objects.count() == 60
+    output = tmp_path / 'report.json'
+    call_command(
+        'bench_load', requests=50, warmup=5, seed=1, output=str(output),
+    )
+    report = json.loads(output.read_text())
+    assert report['requests'] == 50
+    assert sum(route['requests'] for route in report['routes'].values()) == 50
+    names = {f'news:{pattern.name}' for pattern in urls.urlpatterns}
+    assert {route.split()[1] for route in report['routes']} <= names
+
+
+def test_comment_throttled_per_user(
+    author_client,
+    reader_client,
+    url_reverse_detail,
+    settings,
+) -> None:
+    """Тест на 429 сверх лимита пользователя без записи в базу."""
+    settings.THROTTLE_RATES = {'comment': {'user': '2/m'}}
+    for _ in range(2):
+        author_client.post(url_reverse_detail, data=FORM_DATA)
+    response = author_client.post(url_reverse_detail, data=FORM_DATA)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert 0 < int(response['Retry-After']) <= 30
+    assert Comment.objects.count() == 2
+    response = reader_client.post(url_reverse_detail, data=FORM_DATA)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_comment_throttled_per_ip(
+    author_client,
+    reader_client,
+    url_reverse_detail,
+    settings,
+) -> None:
+    """Тест на общий лимит для всех пользователей с одного адреса."""
+    settings.THROTTLE_RATES = {'comment': {'user': '5/m', 'ip': '1/m'}}
+    author_client.post(url_reverse_detail, data=FORM_DATA)
+    response = reader_client.post(url_reverse_detail, data=FORM_DATA)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_token_bucket_refills() -> None:
+    """Тест на наполнение корзины токенов со временем."""
+    bucket = TokenBucket('test', '2/m')
+    assert bucket.take(now=0) == bucket.take(now=0) == 0
+    assert bucket.take(now=0) == 30
+    assert bucket.take(now=30) == 0
+
+
+def test_comment_side_effects_run_as_jobs(
+    author_client,
+    client,
+    comment,
+    url_reverse_home,
+    url_reverse_detail,
+    url_reverse_delete,
+    settings,
+) -> None:
+    """Тест на сброс кеша сразу и пересчёт счётчика задачей."""
+    settings.NEWS_JOB_QUEUE = True
+    client.get(url_reverse_home)
+    for _ in range(3):
+        author_client.post(url_reverse_detail, data=FORM_DATA)
+    assert 'Комментариев: 4' in client.get(url_reverse_home).content.decode()
+    assert not Job.objects.exists()
+    author_client.post(url_reverse_delete)
+    assert list(Job.objects.values_list('kind', flat=True)) == [
+        'refresh_comment_stats'
+    ]
+    call_command('run_jobs', once=True, stdout=StringIO())
+    assert not Job.objects.exists()
+    assert 'Комментариев: 3' in client.get(url_reverse_home).content.decode()
+
+
+def test_failed_job_retried_then_given_up(monkeypatch, settings) -> None:
+    """Тест на повторы упавшей задачи и время видимости взятой."""
+    settings.NEWS_JOB_QUEUE = True
+    settings.NEWS_JOB_MAX_ATTEMPTS = 3
+
+    def broken(payloads):
+        raise RuntimeError('сломано')
+
+    monkeypatch.setitem(jobs.HANDLERS, 'broken', broken)
+    job = jobs.enqueue('broken', value=1)
+    # Взятые задачи перечитываются с основной базы, не с реплики.
+    settings.DATABASE_REPLICAS = ['missing_replica']
+    assert [claimed.pk for claimed in jobs.claim(10, 60)] == [job.pk]
+    assert jobs.claim(10, 60) == []
+    settings.DATABASE_REPLICAS = []
+    Job.objects.update(available_at=timezone.now())
+    assert jobs.run_pending() == (0, 1)
+    job.refresh_from_db()
+    assert job.attempts == 2 and job.available_at > timezone.now()
+    assert 'сломано' in job.last_error
+    Job.objects.update(available_at=timezone.now())
+    assert jobs.run_pending() == (0, 1)
+    job.refresh_from_db()
+    assert job.attempts == 3 and job.available_at is None
+    # Воркер упал с последней попыткой, не вызвав fail().
+    Job.objects.update(available_at=timezone.now())
+    assert jobs.claim(10, 60) == []
@@ -0,0 +1,163 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from pytest_lazyfixture import lazy_fixture as lf
+
+from news.models import Comment
+from news.views import CommentBase
+
+BAD_PLAN = re.compile(r'^SCAN (TABLE )?\w+$|TEMP B-TREE')
+INDEX_SCAN = re.compile(r'^SCAN (TABLE )?\w+ USING (COVERING )?INDEX')
+pytestmark = pytest.mark.django_db
+
+
+def bad_plan_steps(sql):
+    """
+    Шаги плана с полным просмотром таблицы или сортировкой.
+
+    Проход по индексу без поиска допустим только у запроса без WHERE:
+    тогда это чтение в порядке индекса до LIMIT. С условием он читает
+    весь индекс, чтобы найти подходящие строки.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        steps = [row[-1] for row in cursor.fetchall()]
+    filtered = ' WHERE ' in sql
+    return [
+        step for step in steps
+        if BAD_PLAN.search(step) or filtered and INDEX_SCAN.search(step)
+    ]
+
+
+def assert_plans_use_indexes(queries):
+    selects = [
+        query['sql'] for query in queries if query['sql'].startswith('SELECT')
+    ]
+    assert selects
+    for sql in selects:
+        assert bad_plan_steps(sql) == [], sql
+
+
+@pytest.mark.parametrize(
+    'parametrized_client',
+    (lf('client'), lf('author_client')),
+)
+def test_news_list_plans(
+    ten_news,
+    parametrized_client,
+    url_reverse_home,
+) -> None:
+    """Тест планов запросов всех страниц списка новостей."""
+    with CaptureQueriesContext(connection) as captured:
+        page = parametrized_client.get(url_reverse_home).context['page_obj']
+        parametrized_client.get(url_reverse_home, {'after': page.next_cursor})
+        parametrized_client.get(url_reverse_home, {'before': page.next_cursor})
+    assert_plans_use_indexes(captured.captured_queries)
+
+
+def test_news_detail_plans(
+    many_comments,
+    author_client,
+    url_reverse_detail,
+    settings,
+) -> None:
+    """Тест планов запросов страницы новости с комментариями."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 3
+    with CaptureQueriesContext(connection) as captured:
+        page = author_client.get(url_reverse_detail).context['comments_page']
+        author_client.get(url_reverse_detail, {'after': page.next_cursor})
+        author_client.get(url_reverse_detail, {'before': page.next_cursor})
+    assert_plans_use_indexes(captured.captured_queries)
+
+
+@pytest.mark.parametrize(
+    'reverse_url',
+    (lf('url_reverse_edit'), lf('url_reverse_delete')),
+)
+def test_comment_views_plans(author_client, reverse_url) -> None:
+    """Тест планов запросов редактирования и удаления комментария."""
+    with CaptureQueriesContext(connection) as captured:
+        author_client.get(reverse_url)
+    assert_plans_use_indexes(captured.captured_queries)
+
+
+def test_comment_base_queryset_plan(author, many_comments, rf) -> None:
+    """Тест плана выборки всех комментариев пользователя."""
+    view = CommentBase()
+    view.request = rf.get('/')
+    view.request.user = author
+    queryset = view.get_queryset()
+    assert queryset.model is Comment
+    with CaptureQueriesContext(connection) as captured:
+        list(queryset)
+    assert_plans_use_indexes(captured.captured_queries)
+
+
+@pytest.mark.parametrize(
+    'name, by_news',
+    (
+        ('news:api_news', False),
+        ('news:api_comments', False),
+        ('news:api_comments', True),
+    ),
+)
+def test_feed_plans(
+    name, by_news: bool, ten_news, many_comments, new, client, settings
+) -> None:
+    """Тест планов запросов страниц ленты: по индексу (modified, id)."""
+    settings.NEWS_API_PAGE_SIZE = 3
+    url = reverse(name)
+    params = {'news': new.pk} if by_news else {}
+    with CaptureQueriesContext(connection) as captured:
+        data = client.get(url, params).json()
+        client.get(url, {**params, 'after': data['next']})
+        client.get(
+            url, {**params, 'updated_since': '2000-01-01T00:00:00+00:00'}
+        )
+    assert_plans_use_indexes(captured.captured_queries)
+
+
+@pytest.mark.parametrize('name', ('news:rss', 'news:comments_rss'))
+def test_syndication_feed_plans(name, ten_news, many_comments, new, client):
+    """Тест планов запросов лент: последние записи берутся по индексу."""
+    args = (new.pk,) if name == 'news:comments_rss' else ()
+    with CaptureQueriesContext(connection) as captured:
+        client.get(reverse(name, args=args))
+    assert_plans_use_indexes(captured.captured_queries)
+
+
+@pytest.mark.no_query_budget
+@pytest.mark.parametrize(
+    'params', ({}, {'created__year': timezone.now().year}, {'p': 2})
+)
+def test_comment_admin_plans(many_comments, admin_client, params) -> None:
+    """
+    Тест планов запросов списка комментариев в админке.
+
+    Поиск по индексу для иерархии дат повторяется на каждую ссылку,
+    поэтому повторы запросов здесь ожидаемы.
+    """
+    with CaptureQueriesContext(connection) as captured:
+        admin_client.get(reverse('admin:news_comment_changelist'), params)
+    assert_plans_use_indexes(captured.captured_queries)
+
+
+def test_search_plan(ten_news, client, url_reverse_search) -> None:
+    """
+    Тест плана поиска: совпадения берутся из индекса FTS5.
+
+    Сортировка по bm25 неизбежна, но сортируются только совпадения,
+    а новости читаются по первичному ключу.
+    """
+    with CaptureQueriesContext(connection) as captured:
+        client.get(url_reverse_search, {'q': 'новость'})
+    sql = captured.captured_queries[0]['sql']
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        steps = [row[-1] for row in cursor.fetchall()]
+    assert any('VIRTUAL TABLE INDEX' in step for step in steps), steps
+    assert not any(re.match(r'SCAN (TABLE )?news_news$', s) for s in steps)
@@ -1,9 +1,20 @@
+import asyncio
 from http import HTTPStatus
 
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
 from pytest_django.asserts import assertRedirects
 from pytest_lazyfixture import lazy_fixture as lf
 
+from news.models import News
+from news.views import AsyncNewsDetailView, AsyncNewsList, NewsList
+from yanews.db_router import (
+    PIN_COOKIE, PrimaryReplicaRouter, primary_pin_middleware
+)
+
 
 pytestmark = pytest.mark.django_db
 
@@ -17,7 +28,9 @@ pytestmark = pytest.mark.django_db
         (lf('url_reverse_delete'), lf('author_client'), HTTPStatus.OK),
         (lf('url_reverse_detail'), lf('client'), HTTPStatus.OK),
         (lf('url_reverse_home'), lf('client'), HTTPStatus.OK),
+        (lf('url_reverse_search'), lf('client'), HTTPStatus.OK),
         (lf('url_reverse_login'), lf('client'), HTTPStatus.OK),
+        (lf('url_reverse_comments_feed'), lf('client'), HTTPStatus.OK),
         (lf('url_reverse_logout'), lf('client'), HTTPStatus.OK),
         (lf('url_reverse_signup'), lf('client'), HTTPStatus.OK),
     ),
@@ -48,3 +61,88 @@ def test_redirect_for_anonymous_client(
     expected_url: str = f'{login_ulr}?next={reverse_url}'
     response = client.get(reverse_url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.no_query_budget
+def test_query_budget_exceeded_is_reported(
+    client,
+    url_reverse_home,
+    query_budget_reports,
+    monkeypatch,
+) -> None:
+    """Тест на отчёт о превышении бюджета запросов."""
+    monkeypatch.setattr(NewsList, 'query_budget', 0)
+    client.get(url_reverse_home)
+    assert [report.url_name for report in query_budget_reports] == [
+        'news:home'
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_post_budget_in_autocommit(
+    author_client, url_reverse_detail
+) -> None:
+    """Тест на бюджет записи вне тестовой транзакции, где atomic даёт BEGIN."""
+    response = author_client.post(url_reverse_detail, data={'text': 'Текст'})
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    'view_class, with_pk',
+    ((AsyncNewsList, False), (AsyncNewsDetailView, True)),
+)
+def test_async_read_views(rf, new, view_class, with_pk: bool) -> None:
+    """Тест асинхронных версий страниц для ASGI."""
+    kwargs: dict = {'pk': new.pk} if with_pk else {}
+    view = view_class.as_view()
+    assert asyncio.iscoroutinefunction(view)
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    response = async_to_sync(view)(request, **kwargs)
+    assert response.status_code == HTTPStatus.OK
+    assert new.title in response.content.decode()
+
+
+def test_reads_stick_to_primary_after_write(rf, settings) -> None:
+    """Тест на чтение из основной базы сразу после записи."""
+    settings.DATABASE_REPLICAS = ['replica_1']
+    router = PrimaryReplicaRouter()
+    middleware = primary_pin_middleware(
+        lambda request: HttpResponse(router.db_for_read(News))
+    )
+    assert middleware(rf.get('/')).content == b'replica_1'
+    response = middleware(rf.post('/'))
+    assert response.content == b'default'
+    assert router.db_for_write(News) == 'default'
+    request = rf.get('/')
+    request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+    assert middleware(request).content == b'default'
+
+
+def test_primary_pin_async_and_skipped_without_replicas(rf, settings):
+    """Тест на закрепление за основной базой под ASGI и без реплик."""
+    with pytest.raises(MiddlewareNotUsed):
+        primary_pin_middleware(lambda request: HttpResponse())
+    settings.DATABASE_REPLICAS = ['replica_1']
+    router = PrimaryReplicaRouter()
+
+    async def get_response(request):
+        return HttpResponse(await sync_to_async(router.db_for_read)(News))
+
+    middleware = primary_pin_middleware(get_response)
+
+    async def call(request):
+        return await middleware(request)
+
+    assert async_to_sync(call)(rf.get('/')).content == b'replica_1'
+    response = async_to_sync(call)(rf.post('/'))
+    assert response.content == b'default'
+    assert PIN_COOKIE in response.cookies
+
+
+def test_async_view_answers_not_allowed(rf) -> None:
+    """Тест на ответ 405 асинхронной вью без обработчика метода."""
+    view = AsyncNewsList.as_view()
+    response = async_to_sync(view)(rf.put('/'))
+    assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
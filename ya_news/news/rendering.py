@@ -0,0 +1,43 @@
+"""
+Заранее подготовленные представления текста новостей и комментариев.
+
+Краткое содержание новости и HTML комментария считаются один раз
+при сохранении, а не на каждой отрисовке страницы.
+"""
+from django.db import transaction
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 15
+
+
+def make_excerpt(text):
+    """То же, что фильтр truncatewords:15."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+def render_text_html(text):
+    """То же, что фильтр linebreaksbr: экранированный текст с <br>."""
+    return linebreaksbr(text, autoescape=True)
+
+
+def backfill(model, target, render, batch_size=1000):
+    """
+    Пересчитывает поле target из text пачками по первичному ключу.
+
+    Работает и с историческими моделями миграций; возвращает
+    число обновлённых строк.
+    """
+    rows = model.objects.order_by('pk').only('pk', 'text')
+    last_pk = 0
+    updated = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return updated
+        for row in batch:
+            setattr(row, target, render(row.text))
+        with transaction.atomic():
+            model.objects.bulk_update(batch, [target])
+        updated += len(batch)
+        last_pk = batch[-1].pk
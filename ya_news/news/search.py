@@ -0,0 +1,35 @@
+"""
+Полнотекстовый поиск по новостям на FTS5.
+
+Индекс news_news_fts хранит только токены заголовка и текста,
+а триггеры из миграции 0008 обновляют его вместе с таблицей
+новостей. Токенизатор unicode61 приводит кириллицу к нижнему
+регистру, но «ё» и «е» для него разные буквы, поэтому в индекс
+и в запрос попадает текст с «ё», заменённой на «е»: запрос «еж»
+находит «Ёж», а «ёж» — «ежа».
+"""
+import re
+
+FTS_TABLE = 'news_news_fts'
+WORD = re.compile(r'\w+')
+
+
+def build_match_query(text):
+    """
+    Превращает пользовательский ввод в выражение MATCH.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 из ввода
+    не разбирались как синтаксис, и ищется как префикс: так запрос
+    «новост» находит и «новость», и «новости». Пустая строка,
+    если слов нет.
+    """
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def rebuild_index(connection):
+    """Заново строит индекс по содержимому таблицы новостей."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from yanews.auth_cache import forget_user
+
+from .cache import bump_generation
+from .forms import get_bad_words_matcher
+from .jobs import enqueue
+from .models import Comment, News
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_news_pages(sender, signal, instance, **kwargs):
+    """
+    Сбрасывает кеш страниц при изменении новостей и комментариев.
+
+    Поколение меняется дважды: сразу, и после коммита транзакции,
+    чтобы страница, собранная до коммита, тоже не попала в кеш.
+    """
+    bump_generation()
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_save, sender=Comment)
+def update_news_on_comment_save(sender, instance, created, raw, **kwargs):
+    """
+    Новый комментарий увеличивает счётчик новости, правка меняет modified.
+
+    Сигнал срабатывает при любой записи: со страницы новости,
+    из админки или из кода, поэтому счётчик не расходится с базой.
+    """
+    if raw:
+        return
+    news = News.objects.filter(pk=instance.news_id)
+    if created:
+        news.update(
+            comment_count=F('comment_count') + 1,
+            last_comment_at=instance.created,
+            modified=timezone.now(),
+        )
+    else:
+        news.update(modified=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def update_news_on_comment_delete(sender, instance, **kwargs):
+    """
+    Удаление комментария пересчитывает счётчики его новости.
+
+    Пересчёт у популярной новости долгий, поэтому с очередью задач
+    (NEWS_JOB_QUEUE) он ставится задачей, а сразу меняется только
+    modified для ETag.
+    """
+    news = News.objects.filter(pk=instance.news_id)
+    if settings.NEWS_JOB_QUEUE:
+        enqueue('refresh_comment_stats', news_id=instance.news_id)
+        news.update(modified=timezone.now())
+    else:
+        news.refresh_comment_stats()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    """Изменённый пользователь больше не берётся из кеша."""
+    forget_user(instance.pk)
+
+
+@receiver(setting_changed)
+def reset_bad_words_matcher(setting, **kwargs):
+    """Пересобирает автомат, если в тестах подменили словарь."""
+    if setting == 'BAD_WORDS_FILE':
+        get_bad_words_matcher.cache_clear()
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение SQLite по SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
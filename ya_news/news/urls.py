@@ -1,16 +1,57 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, feeds, views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    home_view = views.AsyncNewsList
+    detail_view = views.AsyncNewsDetailView
+else:
+    home_view = views.NewsList
+    detail_view = views.NewsDetailView
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', home_view.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', detail_view.as_view(), name='detail'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'feeds/rss/',
+        feeds.cached_feed(feeds.LatestNewsFeed),
+        name='rss',
+    ),
+    path(
+        'feeds/atom/',
+        feeds.cached_feed(feeds.LatestNewsAtomFeed),
+        name='atom',
+    ),
+    path(
+        'news/<int:pk>/comments/rss/',
+        feeds.cached_feed(feeds.NewsCommentsFeed),
+        name='comments_rss',
+    ),
+    path(
+        'news/<int:pk>/comments/atom/',
+        feeds.cached_feed(feeds.NewsCommentsAtomFeed),
+        name='comments_atom',
+    ),
+    path('api/news/', api.NewsFeed.as_view(), name='api_news'),
+    path('api/comments/', api.CommentFeed.as_view(), name='api_comments'),
+    path(
+        'api/export/news.ndjson',
+        api.NewsExport.as_view(),
+        name='export_news',
+    ),
+    path(
+        'api/export/comments.ndjson',
+        api.CommentExport.as_view(),
+        name='export_comments',
+    ),
 ]
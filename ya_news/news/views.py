@@ -1,48 +1,125 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import close_old_connections, transaction
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 
+from .cache import get_cached_page, page_cache_key, set_cached_page
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import KeysetPaginator
+from .throttle import ThrottleMixin
+
+
+class CachedPageMixin:
+    """
+    Отдаёт анонимным пользователям готовую страницу из кеша.
+
+    Ключ кеша содержит поколение данных, которое меняется при любой
+    записи новости или комментария, так что устаревшая страница
+    не может быть отдана после изменения.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = page_cache_key(request)
+        cached = get_cached_page(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda rendered: set_cached_page(key, rendered)
+        )
+        return response
 
 
-class NewsList(generic.ListView):
+class NewsList(CachedPageMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    keyset_ordering = ('-date', '-id')
+    query_budget = 4
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
-
-        Их количество определяется в настройках проекта.
+        Количество комментариев берётся из счётчика в самой новости,
+        поэтому комментарии не загружаются. Вместо полного текста
+        выводится готовое краткое содержание.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.defer('text')
+
+    def get_paginate_by(self, queryset):
+        """Количество новостей на странице задаётся в настройках."""
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.keyset_ordering, page_size)
+        page = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class NewsSearch(NewsList):
+    """Поиск по заголовкам и текстам новостей, лучшие совпадения первыми."""
+    template_name = 'news/search.html'
+    keyset_ordering = ('rank', 'id')
+
+    def get_queryset(self):
+        return self.model.objects.search(
+            self.request.GET.get('q', '')
+        ).defer('text')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
 
 
 class NewsDetail(generic.DetailView):
     model = News
     template_name = 'news/detail.html'
+    comments_ordering = ('created', 'id')
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """Комментарии выводятся постранично."""
         context = super().get_context_data(**kwargs)
+        paginator = KeysetPaginator(
+            self.object.comment_set.select_related('author'),
+            self.comments_ordering,
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        )
+        page = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        context['comments_page'] = page
+        context['comment_list'] = page.object_list
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
 class NewsComment(
+        ThrottleMixin,
         LoginRequiredMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
@@ -50,6 +127,7 @@ class NewsComment(
     model = News
     form_class = CommentForm
     template_name = 'news/detail.html'
+    throttle_scope = 'comment'
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
@@ -59,17 +137,54 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        # Счётчик новости обновляет сигнал post_save в той же транзакции.
+        with transaction.atomic():
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
+
+
+def get_news_validators(request, pk):
+    """
+    Данные для ETag и Last-Modified одним запросом по одной строке.
+
+    Результат запоминается в запросе, чтобы обе функции
+    декоратора condition обращались к базе один раз.
+    """
+    if not hasattr(request, 'news_validators'):
+        request.news_validators = News.objects.filter(pk=pk).values(
+            'date', 'modified', 'comment_count', 'last_comment_at'
+        ).first()
+    return request.news_validators
+
+
+def news_etag(request, pk):
+    """Страница зависит и от пользователя: у автора есть ссылки правки."""
+    validators = get_news_validators(request, pk)
+    if validators is None:
+        return None
+    source = ':'.join(
+        str(value) for value in (pk, request.user.pk, *validators.values())
+    )
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def news_last_modified(request, pk):
+    validators = get_news_validators(request, pk)
+    return validators and validators['modified']
 
 
 class NewsDetailView(generic.View):
+    query_budget = {'GET': 6, 'POST': 5}
 
+    @method_decorator(vary_on_cookie)
+    @method_decorator(condition(news_etag, news_last_modified))
     def get(self, request, *args, **kwargs):
+        """Неизменившуюся страницу не собираем, а отвечаем 304."""
         view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
 
@@ -78,14 +193,90 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+@functools.lru_cache(maxsize=None)
+def get_read_executor():
+    """
+    Ограниченный пул потоков для чтения из базы в асинхронных вью.
+
+    У каждого потока своё соединение, поэтому размер пула
+    ограничивает и число одновременных соединений с базой.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.NEWS_ASYNC_READ_THREADS,
+        thread_name_prefix='news-read',
+    )
+
+
+def render_view(view, request, *args, **kwargs):
+    close_old_connections()
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+async def run_read_view(view, request, *args, **kwargs):
+    """Выполняет вью вместе с отрисовкой шаблона в пуле чтения."""
+    context = contextvars.copy_context()
+    call = functools.partial(
+        context.run, render_view, view, request, *args, **kwargs
+    )
+    return await asyncio.get_running_loop().run_in_executor(
+        get_read_executor(), call
+    )
+
+
+class AsyncViewMixin:
+    """
+    Django 3.2 распознаёт асинхронные вью только по функции as_view.
+
+    Поэтому as_view возвращает обёртку async def; ответы методов
+    без async-обработчика (например, 405) возвращаются как есть.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        return functools.update_wrapper(async_view, view)
+
+
+class AsyncNewsList(AsyncViewMixin, generic.View):
+    """NewsList для ASGI: поток обработки не ждёт базу."""
+
+    async def get(self, request, *args, **kwargs):
+        return await run_read_view(
+            NewsList.as_view(), request, *args, **kwargs
+        )
+
+
+class AsyncNewsDetailView(AsyncViewMixin, NewsDetailView):
+    """NewsDetailView для ASGI: чтение идёт в пуле потоков."""
+
+    async def get(self, request, *args, **kwargs):
+        return await run_read_view(
+            NewsDetailView.as_view(), request, *args, **kwargs
+        )
+
+    async def post(self, request, *args, **kwargs):
+        view = sync_to_async(NewsComment.as_view())
+        return await view(request, *args, **kwargs)
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
+    query_budget = 5
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -102,3 +293,9 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+    query_budget = {'GET': 5, 'POST': 6}
+
+    def delete(self, request, *args, **kwargs):
+        """Счётчики новости обновляет сигнал post_delete в транзакции."""
+        with transaction.atomic():
+            return super().delete(request, *args, **kwargs)
@@ -0,0 +1,41 @@
+"""
+Плагин pytest: тест падает, если вью превысило бюджет запросов.
+
+Подключается в conftest.py проекта, отчёты присылает
+yanews.query_budget.QueryBudgetMiddleware.
+"""
+import pytest
+from django.conf import settings
+
+from .query_budget import budget_exceeded
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'no_query_budget: не проверять бюджет запросов в этом тесте',
+    )
+
+
+@pytest.fixture(autouse=True, scope='session')
+def enable_query_budget():
+    settings.QUERY_BUDGET_ENABLED = True
+
+
+@pytest.fixture(autouse=True)
+def query_budget_reports(request):
+    """Собирает отчёты о превышении бюджета за время теста."""
+    reports = []
+
+    def collect(sender, report, **kwargs):
+        reports.append(report)
+
+    budget_exceeded.connect(collect, weak=False)
+    yield reports
+    budget_exceeded.disconnect(collect)
+    if reports and not request.node.get_closest_marker('no_query_budget'):
+        pytest.fail(
+            'Превышен бюджет запросов:\n'
+            + '\n'.join(str(report) for report in reports),
+            pytrace=False,
+        )
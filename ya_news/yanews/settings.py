@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,10 +23,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yanews.query_budget.QueryBudgetMiddleware',
+    'yanews.db_router.primary_pin_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanews.auth_cache.cached_user_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -58,6 +62,84 @@ DATABASES = {
     }
 }
 
+DATABASE_REPLICAS = []
+
+for index, name in enumerate(
+    filter(None, os.getenv('YANEWS_REPLICA_DBS', '').split(',')), 1
+):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['yanews.db_router.PrimaryReplicaRouter']
+
+PRIMARY_PIN_SECONDS = 10
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PRAGMAS = {}
+
+if os.getenv('YANEWS_DB_PROFILE') == 'production':
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+
+# Поколение данных и готовые страницы лежат в файлах, общих для всех
+# процессов: записи из воркера задач и команд manage.py тоже сбрасывают
+# кеш, который читают процессы сайта.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yanews',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'YANEWS_PAGE_CACHE_DIR', BASE_DIR / 'cache' / 'pages'
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+NEWS_PAGE_CACHE = 'pages'
+
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+AUTH_USER_CACHE_ENABLED = False
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
+if os.getenv('YANEWS_SESSION_ENGINE') in SESSION_ENGINES:
+    SESSION_ENGINE = SESSION_ENGINES[os.getenv('YANEWS_SESSION_ENGINE')]
+    AUTH_USER_CACHE_ENABLED = True
+
+# Корзины токенов для записей: ёмкость/период на пользователя и на IP.
+THROTTLE_RATES = {
+    'comment': {'user': '10/m', 'ip': '60/m'},
+}
+
+THROTTLE_CACHE = 'default'
+
+if os.getenv('YANEWS_THROTTLE_CACHE_DIR'):
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('YANEWS_THROTTLE_CACHE_DIR'),
+    }
+    THROTTLE_CACHE = 'throttle'
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +162,30 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+
+BAD_WORDS_FILE = None
+
+QUERY_BUDGET_ENABLED = DEBUG
+
+# Асинхронные вью под ASGI пока медленнее WSGI (manage.py
+# bench_read_path), поэтому включаются только явно.
+NEWS_ASYNC_VIEWS = os.getenv('YANEWS_ASYNC_VIEWS') == '1'
+
+NEWS_ASYNC_READ_THREADS = 8
+
+NEWS_FEED_ITEMS = 30
+
+NEWS_API_PAGE_SIZE = 100
+
+# Фоновые задачи в таблице news_job выполняет manage.py run_jobs.
+NEWS_JOB_QUEUE = os.getenv('YANEWS_JOB_QUEUE') == '1'
+
+NEWS_JOB_MAX_ATTEMPTS = 5
+
+NEWS_JOB_RETRY_DELAY = 10
+
+NEWS_EXPORT_CHUNK_SIZE = 2000
@@ -0,0 +1,86 @@
+"""
+Потоковая выгрузка заметок пользователя в zip и gzip NDJSON.
+
+Заметки читаются из базы пачками через iterator(), а архив
+отдаётся кусками по мере готовности, поэтому память не растёт
+с числом заметок. Markdown в zip читается обратно импортом.
+"""
+import json
+import zipfile
+import zlib
+
+from django.conf import settings
+
+from .models import Note
+
+FIELDS = ('title', 'text', 'slug')
+
+
+class ChunkBuffer:
+    """Файл только для записи: zipfile пишет в него, генератор забирает."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_notes(author, chunk_size=None):
+    """Поля заметок автора в порядке id, пачками по chunk_size."""
+    return Note.objects.filter(author=author).order_by('id').values(
+        *FIELDS
+    ).iterator(chunk_size=chunk_size or settings.NOTES_EXPORT_CHUNK_SIZE)
+
+
+def to_markdown(note):
+    """Заметка в том виде, который понимает parse_markdown."""
+    return f'# {note["title"]} {{#{note["slug"]}}}\n\n{note["text"]}\n'
+
+
+def stream_zip(notes, chunk_size=None):
+    """Zip-архив с файлом slug.md на каждую заметку."""
+    chunk_size = chunk_size or settings.NOTES_EXPORT_CHUNK_SIZE
+    buffer = ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for number, note in enumerate(notes, start=1):
+            archive.writestr(f'{note["slug"]}.md', to_markdown(note))
+            if number % chunk_size == 0:
+                yield buffer.drain()
+    yield buffer.drain()
+
+
+def stream_ndjson_gz(notes, chunk_size=None):
+    """Заметки по одной в строке NDJSON, сжатые gzip."""
+    chunk_size = chunk_size or settings.NOTES_EXPORT_CHUNK_SIZE
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    lines = []
+    for note in notes:
+        lines.append(json.dumps(note, ensure_ascii=False))
+        if len(lines) == chunk_size:
+            yield compressor.compress(('\n'.join(lines) + '\n').encode())
+            lines = []
+    if lines:
+        yield compressor.compress(('\n'.join(lines) + '\n').encode())
+    yield compressor.flush()
+
+
+FORMATS = {
+    'zip': (stream_zip, 'application/zip', 'notes.zip'),
+    'ndjson': (stream_ndjson_gz, 'application/gzip', 'notes.ndjson.gz'),
+}
+
+
+def export_notes(author, export_format, chunk_size=None):
+    """Куски архива с заметками автора."""
+    stream = FORMATS[export_format][0]
+    return stream(iter_notes(author, chunk_size), chunk_size)
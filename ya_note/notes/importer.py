@@ -0,0 +1,225 @@
+"""
+Массовый импорт заметок из JSON, CSV и Markdown.
+
+Все записи проверяются в памяти полями NoteForm, адреса сверяются
+с одним заранее загруженным множеством существующих slug, а запись
+в базу идёт пачками через bulk_create.
+"""
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, router, transaction
+from pytils.translit import slugify
+
+from .forms import WARNING, NoteForm
+from .models import Note
+from .search import index_notes
+
+HEADING = re.compile(r'^#\s+(?P<title>.*?)(?:\s+\{#(?P<slug>[^}]*)\})?\s*$')
+
+
+class ImportFormatError(ValueError):
+    """Файл не удалось разобрать."""
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, message):
+        self.errors.append((row, message))
+
+
+def parse_json(content):
+    rows = json.loads(content)
+    if not isinstance(rows, list):
+        raise ImportFormatError('Ожидается список заметок.')
+    return [row if isinstance(row, dict) else {} for row in rows]
+
+
+def parse_csv(content):
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def parse_markdown(content):
+    """
+    Каждый заголовок первого уровня начинает новую заметку.
+
+    Адрес можно указать после заголовка: «# Покупки {#shopping}».
+    """
+    rows = []
+    for line in content.splitlines():
+        heading = HEADING.match(line)
+        if heading:
+            rows.append({**heading.groupdict(), 'text': []})
+        elif rows:
+            rows[-1]['text'].append(line)
+    for row in rows:
+        row['text'] = '\n'.join(row['text']).strip()
+        row['slug'] = row['slug'] or ''
+    return rows
+
+
+PARSERS = {
+    '.json': parse_json,
+    '.csv': parse_csv,
+    '.md': parse_markdown,
+    '.markdown': parse_markdown,
+}
+
+
+def parse_notes(name, data):
+    """Записи файла в виде словарей с полями title, text и slug."""
+    parser = PARSERS.get(Path(name).suffix.lower())
+    if parser is None:
+        raise ImportFormatError(
+            'Поддерживаются файлы ' + ', '.join(PARSERS) + '.'
+        )
+    try:
+        return parser(data.decode('utf-8-sig'))
+    except (UnicodeDecodeError, ValueError, csv.Error) as error:
+        raise ImportFormatError(
+            f'Не удалось разобрать {name}: {error}'
+        ) from error
+
+
+def allocate_slug(base, taken, max_length, next_suffix):
+    """
+    Первый свободный адрес вида base, base-2, base-3...
+
+    В next_suffix запоминается номер, на котором остановился поиск
+    для base, поэтому тысячи одинаковых заголовков не перебирают
+    суффиксы каждый раз с начала.
+    """
+    base = base or 'note'
+
+    def numbered(number):
+        if number == 1:
+            return base
+        suffix = f'-{number}'
+        return base[:max_length - len(suffix)] + suffix
+
+    number = next_suffix.get(base, 1)
+    slug = numbered(number)
+    while slug in taken:
+        number += 1
+        slug = numbered(number)
+    next_suffix[base] = number
+    return slug
+
+
+def clean_row(fields, row):
+    """
+    Проверяет запись полями формы без создания формы на каждую строку.
+
+    Сообщения об ошибках те же, что показывает NoteForm.
+    """
+    cleaned = {}
+    errors = []
+    for name, form_field in fields.items():
+        try:
+            cleaned[name] = form_field.clean(row.get(name) or '')
+        except ValidationError as error:
+            errors.extend(error.messages)
+    return cleaned, errors
+
+
+def build_notes(author, rows, result, using):
+    """
+    Проверяет записи и готовит несохранённые заметки.
+
+    Явно указанный занятый slug — ошибка с тем же текстом, что и
+    в NoteForm; адрес, построенный из заголовка, при совпадении
+    получает числовой суффикс. Заметки возвращаются вместе
+    с номерами строк файла.
+    """
+    fields = NoteForm().fields
+    max_length = Note._meta.get_field('slug').max_length
+    taken = set(Note.objects.using(using).values_list('slug', flat=True))
+    next_suffix = {}
+    notes = []
+    for number, row in enumerate(rows, start=1):
+        cleaned, errors = clean_row(fields, row)
+        if errors:
+            result.add_error(number, '; '.join(errors))
+            continue
+        slug = cleaned['slug']
+        if slug in taken:
+            result.add_error(number, slug + WARNING)
+            continue
+        if not slug:
+            slug = allocate_slug(
+                slugify(cleaned['title'])[:max_length],
+                taken,
+                max_length,
+                next_suffix,
+            )
+        taken.add(slug)
+        notes.append((number, Note(
+            title=cleaned['title'],
+            text=cleaned['text'],
+            slug=slug,
+            author=author,
+        )))
+    return notes
+
+
+def save_notes(author, notes, using, batch_size):
+    """Записывает заметки пачками и добавляет их в поисковый индекс."""
+    with transaction.atomic(using=using):
+        last = Note.objects.using(using).order_by('-pk').first()
+        Note.objects.using(using).bulk_create(notes, batch_size=batch_size)
+        # bulk_create в SQLite не возвращает первичные ключи, а они
+        # нужны поисковому индексу: берём их по уникальным slug.
+        ids = dict(Note.objects.using(using).filter(
+            author=author, pk__gt=last.pk if last else 0
+        ).values_list('slug', 'pk'))
+        for note in notes:
+            note.pk = ids[note.slug]
+        index_notes(connections[using], notes)
+
+
+def taken_slugs(notes, using, batch_size):
+    """Какие из адресов заметок уже есть в базе."""
+    slugs = [note.slug for note in notes]
+    taken = set()
+    for start in range(0, len(slugs), batch_size):
+        taken.update(Note.objects.using(using).filter(
+            slug__in=slugs[start:start + batch_size]
+        ).values_list('slug', flat=True))
+    return taken
+
+
+def import_notes(author, rows, batch_size=1000):
+    """Сохраняет все корректные записи, ошибки возвращает построчно."""
+    result = ImportResult()
+    # Адреса сверяются с основной базой: реплика может отставать.
+    using = router.db_for_write(Note)
+    numbered = build_notes(author, rows, result, using)
+    while numbered:
+        notes = [note for _, note in numbered]
+        try:
+            save_notes(author, notes, using, batch_size)
+        except IntegrityError:
+            # Адрес, свободный при проверке, мог занять другой запрос.
+            clashes = taken_slugs(notes, using, batch_size)
+            if not clashes:
+                raise
+            for number, note in numbered:
+                if note.slug in clashes:
+                    result.add_error(number, note.slug + WARNING)
+            numbered = [
+                (number, note) for number, note in numbered
+                if note.slug not in clashes
+            ]
+            continue
+        result.created = len(notes)
+        break
+    result.errors.sort()
+    return result
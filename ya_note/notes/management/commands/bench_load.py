@@ -0,0 +1,220 @@
+import json
+import math
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from notes import urls
+from notes.models import Note
+from notes.synthetic import TextGenerator
+
+# Доля каждого маршрута в потоке запросов: (имя, метод) -> вес.
+MIX = {
+    ('home', 'GET'): 5,
+    ('list', 'GET'): 25,
+    ('detail', 'GET'): 25,
+    ('search', 'GET'): 15,
+    ('add', 'GET'): 3,
+    ('add', 'POST'): 5,
+    ('edit', 'GET'): 4,
+    ('delete', 'GET'): 1,
+    ('success', 'GET'): 3,
+    ('import', 'GET'): 1,
+    ('import', 'POST'): 0.5,
+    ('api_batch', 'POST'): 2,
+    ('export_zip', 'GET'): 0.05,
+    ('export_ndjson', 'GET'): 0.05,
+}
+
+
+class QueryCounter:
+    """Считает запросы ко всем базам, как QueryBudgetMiddleware."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = [latency for latency, _ in samples]
+    queries = [count for _, count in samples]
+    return {
+        'requests': len(samples),
+        'throughput': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_mean': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+    }
+
+
+class Traffic:
+    """
+    Собирает запросы к маршрутам notes.urls на данных из базы.
+
+    Заметки для запросов выбираются случайно, поэтому плодовитые
+    авторы встречаются в потоке настолько же чаще, насколько
+    больше у них заметок.
+    """
+
+    def __init__(self, rng, sample):
+        self.rng = rng
+        self.texts = TextGenerator(rng)
+        self.clients = {}
+        self.notes = list(Note.objects.order_by('-pk').values_list(
+            'slug', 'author_id', 'title'
+        )[:sample])
+        if not self.notes:
+            raise CommandError('Нет заметок: запустите seed_data.')
+
+    def client_for(self, user_id):
+        if user_id not in self.clients:
+            client = Client(SERVER_NAME='localhost')
+            client.force_login(get_user_model().objects.get(pk=user_id))
+            self.clients[user_id] = client
+        return self.clients[user_id]
+
+    def new_note(self):
+        return {
+            'title': self.texts.title(50),
+            'text': self.texts.text(),
+            'slug': f'load-{self.rng.getrandbits(64):x}',
+        }
+
+    def request(self, name, method):
+        """Клиент, метод, адрес и аргументы одного запроса."""
+        slug, author_id, title = self.rng.choice(self.notes)
+        author = self.client_for(author_id)
+        if name in ('detail', 'edit', 'delete'):
+            return author, 'get', reverse(f'notes:{name}', args=(slug,)), {}
+        if name == 'search':
+            return author, 'get', reverse('notes:search'), {
+                'data': {'q': self.rng.choice(title.split())[:4]}
+            }
+        if name == 'add' and method == 'POST':
+            return author, 'post', reverse('notes:add'), {
+                'data': self.new_note()
+            }
+        if name == 'import' and method == 'POST':
+            upload = SimpleUploadedFile('notes.json', json.dumps(
+                [self.new_note() for _ in range(10)]
+            ).encode())
+            return author, 'post', reverse('notes:import'), {
+                'data': {'file': upload}
+            }
+        if name == 'api_batch':
+            operations = [
+                {'op': 'create', 'data': self.new_note()} for _ in range(5)
+            ]
+            return author, 'post', reverse('notes:api_batch'), {
+                'data': json.dumps({'operations': operations}),
+                'content_type': 'application/json',
+            }
+        return author, 'get', reverse(f'notes:{name}'), {}
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет смесь запросов по всем маршрутам notes.urls и выводит '
+        'пропускную способность, p50/p95/p99 и число запросов к базе '
+        'в JSON для сравнения релизов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=1000,
+            help='Сколько заметок брать в работу.',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Файл для отчёта JSON.')
+
+    def handle(self, *args, **options):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        missing = names - {name for name, _ in MIX}
+        if missing:
+            raise CommandError(
+                'Нет веса в смеси для маршрутов: '
+                + ', '.join(sorted(missing))
+            )
+        rng = random.Random(options['seed'])
+        # Без отладочного журнала запросов и проверки бюджета,
+        # как на рабочем сервере. Все запросы идут с одного адреса,
+        # поэтому ограничение частоты записей тоже отключено.
+        with override_settings(
+            DEBUG=False, QUERY_BUDGET_ENABLED=False, THROTTLE_RATES={}
+        ):
+            traffic = Traffic(rng, options['sample'])
+            routes = rng.choices(
+                list(MIX),
+                weights=list(MIX.values()),
+                k=options['warmup'] + options['requests'],
+            )
+            for route in routes[:options['warmup']]:
+                self.send(traffic, *route)
+            samples = defaultdict(list)
+            statuses = defaultdict(Counter)
+            started = time.perf_counter()
+            for route in routes[options['warmup']:]:
+                status, latency, queries = self.send(traffic, *route)
+                samples[route].append((latency, queries))
+                statuses[route][status] += 1
+            elapsed = time.perf_counter() - started
+        report = {
+            'project': 'ya_note',
+            'seconds': round(elapsed, 3),
+            **summarize(
+                [sample for route in samples.values() for sample in route],
+                elapsed,
+            ),
+            'routes': {
+                f'{method} notes:{name}': {
+                    **summarize(samples[name, method], elapsed),
+                    'statuses': dict(statuses[name, method]),
+                }
+                for name, method in sorted(samples)
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def send(self, traffic, name, method):
+        """Статус, длительность и число запросов к базе."""
+        client, verb, path, kwargs = traffic.request(name, method)
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            started = time.perf_counter()
+            response = getattr(client, verb)(path, **kwargs)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            latency = time.perf_counter() - started
+        return response.status_code, latency, counter.count
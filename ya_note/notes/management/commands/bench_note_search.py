@@ -0,0 +1,159 @@
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from notes.search import build_match_query, note_terms, words
+
+NoteRow = namedtuple('NoteRow', 'pk title text slug author_id')
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'ту', 'не', 'ла', 'сто', 'при', 'вен', 'дом',
+    'пол', 'ёж', 'ри', 'ков', 'за', 'мет', 'ки', 'план', 'ус', 'бор',
+)
+SCHEMA = (
+    'CREATE TABLE note ('
+    'id INTEGER PRIMARY KEY, title TEXT, text TEXT, slug TEXT, '
+    'author_id INTEGER)',
+    'CREATE INDEX note_author_id ON note (author_id, id)',
+    "CREATE VIRTUAL TABLE scoped_fts USING fts5("
+    "terms, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE global_fts USING fts5("
+    "title, text, slug, tokenize='unicode61 remove_diacritics 2')",
+)
+QUERIES = {
+    'LIKE по автору': (
+        'SELECT id FROM note WHERE author_id = ? AND ('
+        'title LIKE ? OR text LIKE ? OR slug LIKE ?) ORDER BY id LIMIT 20'
+    ),
+    'общий FTS': (
+        'SELECT note.id FROM global_fts '
+        'JOIN note ON note.id = global_fts.rowid '
+        'WHERE global_fts MATCH ? AND note.author_id = ? '
+        'ORDER BY bm25(global_fts) LIMIT 20'
+    ),
+    'FTS автора': (
+        'SELECT note.id FROM scoped_fts '
+        'JOIN note ON note.id = scoped_fts.rowid '
+        'WHERE scoped_fts MATCH ? AND note.author_id = ? '
+        'ORDER BY bm25(scoped_fts) LIMIT 20'
+    ),
+}
+
+
+def make_vocabulary(size, rng):
+    vocabulary = set()
+    while len(vocabulary) < size:
+        vocabulary.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(vocabulary)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по заметкам одного автора: LIKE, общий индекс '
+        'FTS5 и индекс с префиксом автора.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument(
+            '--heavy-share',
+            type=float,
+            default=0.01,
+            help='Доля заметок у автора, от имени которого идёт поиск.',
+        )
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = make_vocabulary(5000, rng)
+        with tempfile.TemporaryDirectory() as directory:
+            connection = sqlite3.connect(str(Path(directory) / 'bench.db'))
+            started = time.perf_counter()
+            self.fill(connection, vocabulary, rng, options)
+            self.stdout.write(
+                f'Заметок: {options["notes"]}, '
+                f'заполнение {time.perf_counter() - started:.0f} с'
+            )
+            self.report(connection, vocabulary, rng, options['queries'])
+            connection.close()
+
+    def fill(self, connection, vocabulary, rng, options):
+        heavy = int(options['notes'] * options['heavy_share'])
+        for statement in SCHEMA:
+            connection.execute(statement)
+        batch = []
+        for pk in range(1, options['notes'] + 1):
+            author_id = (
+                1 if pk <= heavy else rng.randint(2, options['authors'])
+            )
+            title = ' '.join(rng.choices(vocabulary, k=3))
+            batch.append(NoteRow(
+                pk,
+                title,
+                ' '.join(rng.choices(vocabulary, k=30)),
+                f'note-{pk}',
+                author_id,
+            ))
+            if len(batch) == 10000 or pk == options['notes']:
+                self.insert(connection, batch)
+                batch = []
+        for table in ('scoped_fts', 'global_fts'):
+            connection.execute(
+                f"INSERT INTO {table}({table}) VALUES ('optimize')"
+            )
+        connection.commit()
+
+    def insert(self, connection, batch):
+        connection.executemany(
+            'INSERT INTO note VALUES (?, ?, ?, ?, ?)',
+            [(n.pk, n.title, n.text, n.slug, n.author_id) for n in batch],
+        )
+        connection.executemany(
+            'INSERT INTO scoped_fts(rowid, terms) VALUES (?, ?)',
+            [(n.pk, note_terms(n)) for n in batch],
+        )
+        connection.executemany(
+            'INSERT INTO global_fts(rowid, title, text, slug) '
+            'VALUES (?, ?, ?, ?)',
+            [(n.pk, n.title, n.text, n.slug) for n in batch],
+        )
+
+    def report(self, connection, vocabulary, rng, count):
+        """Набор текста: префиксы из 2–5 букв случайных слов."""
+        prefixes = [
+            word[:rng.randint(2, 5)]
+            for word in rng.choices(vocabulary, k=count)
+        ]
+        self.stdout.write(f'{"способ":<16} {"p50, мс":>10} {"p99, мс":>10}')
+        for name, sql in QUERIES.items():
+            latencies = []
+            for prefix in prefixes:
+                params = self.params(name, prefix)
+                started = time.perf_counter()
+                connection.execute(sql, params).fetchall()
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            p99 = latencies[
+                min(len(latencies) - 1, int(len(latencies) * 0.99))
+            ]
+            self.stdout.write(
+                f'{name:<16} {statistics.median(latencies) * 1000:>10.2f} '
+                f'{p99 * 1000:>10.2f}'
+            )
+
+    def params(self, name, prefix):
+        if name == 'LIKE по автору':
+            pattern = f'%{prefix}%'
+            return (1, pattern, pattern, pattern)
+        if name == 'общий FTS':
+            query = ' '.join(f'"{word}"*' for word in words(prefix))
+            return (query, 1)
+        return (build_match_query(1, prefix), 1)
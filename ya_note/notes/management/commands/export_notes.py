@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from notes.exporter import FORMATS, export_notes
+
+SUFFIXES = {'zip': '.zip', 'ndjson': '.ndjson.gz'}
+
+
+def export_user(user_id, username, directory, export_format, chunk_size):
+    """Пишет архив одного пользователя, возвращает путь и размер."""
+    path = Path(directory) / f'{username}{SUFFIXES[export_format]}'
+    size = 0
+    with open(path, 'wb') as output:
+        for chunk in export_notes(user_id, export_format, chunk_size):
+            output.write(chunk)
+            size += len(chunk)
+    return str(path), size
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заметки пользователей в архивы, '
+        'по одному файлу на пользователя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='По умолчанию — все пользователи с заметками.',
+        )
+        parser.add_argument('--output-dir', default='.')
+        parser.add_argument('--format', choices=FORMATS, default='zip')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов выгружают пользователей параллельно.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        else:
+            users = users.filter(note__isnull=False).distinct()
+        users = list(users.values_list('pk', 'username'))
+        missing = set(options['usernames']) - {name for _, name in users}
+        if missing:
+            raise CommandError(
+                'Пользователи не найдены: ' + ', '.join(sorted(missing))
+            )
+        directory = Path(options['output_dir'])
+        directory.mkdir(parents=True, exist_ok=True)
+        jobs = [
+            (pk, username, directory, options['format'],
+             options['chunk_size'])
+            for pk, username in users
+        ]
+        started = time.perf_counter()
+        if options['workers'] > 1:
+            # Соединения с базой не должны достаться процессам-потомкам.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                options['workers'], initializer=django.setup
+            ) as pool:
+                futures = [pool.submit(export_user, *job) for job in jobs]
+                self.report(future.result() for future in futures)
+        else:
+            self.report(export_user(*job) for job in jobs)
+        self.stdout.write(
+            f'Пользователей: {len(jobs)}, '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+
+    def report(self, results):
+        for path, size in results:
+            self.stdout.write(f'{path}: {size} байт')
@@ -0,0 +1,43 @@
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.importer import ImportFormatError, import_notes, parse_notes
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки пользователя из файлов JSON, CSV и Markdown.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('files', nargs='+')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько заметок вставлять одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        for name in options['files']:
+            started = time.perf_counter()
+            try:
+                rows = parse_notes(name, Path(name).read_bytes())
+            except (OSError, ImportFormatError) as error:
+                raise CommandError(str(error))
+            result = import_notes(author, rows, options['batch_size'])
+            for row, message in result.errors:
+                self.stderr.write(f'{name}, запись {row}: {message}')
+            self.stdout.write(
+                f'{name}: добавлено {result.created} из {len(rows)} '
+                f'за {time.perf_counter() - started:.1f} с'
+            )
@@ -0,0 +1,104 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from notes.models import Note
+from notes.search import index_notes
+from notes.synthetic import TextGenerator, batched, skewed_picker
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями и заметками: '
+        'немногие авторы пишут большую часть заметок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--notes', type=int, default=100000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа для авторов.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--prefix', default='seed')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.texts = TextGenerator(self.rng)
+        self.batch_size = options['batch_size']
+        user_ids = self.create_users(options['users'], options['prefix'])
+        if options['notes']:
+            user_ids = user_ids or list(
+                get_user_model().objects.values_list('pk', flat=True)
+            )
+            self.rng.shuffle(user_ids)
+            self.create_notes(
+                options['notes'],
+                options['prefix'],
+                skewed_picker(user_ids, options['skew'], self.rng),
+            )
+
+    def create_users(self, count, prefix):
+        User = get_user_model()
+        started = time.perf_counter()
+        last = User.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        start = User.objects.filter(username__startswith=prefix).count()
+        users = (
+            User(
+                username=f'{prefix}{start + index}',
+                password=make_password(None),
+            )
+            for index in range(count)
+        )
+        for batch in batched(users, self.batch_size):
+            with transaction.atomic():
+                User.objects.bulk_create(batch)
+        self.stdout.write(
+            f'{User._meta.verbose_name_plural}: {count} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
+        # bulk_create в SQLite не возвращает первичные ключи.
+        return list(User.objects.filter(pk__gt=last).values_list(
+            'pk', flat=True
+        ))
+
+    def create_notes(self, count, prefix, pick_author):
+        """Заметки сразу попадают в поисковый индекс, пачка за пачкой."""
+        max_length = Note._meta.get_field('title').max_length
+        start = Note.objects.filter(slug__startswith=f'{prefix}-').count()
+        started = time.perf_counter()
+        for batch in batched(range(start, start + count), self.batch_size):
+            notes = [
+                Note(
+                    title=self.texts.title(max_length),
+                    text=self.texts.text(sentences=8),
+                    slug=f'{prefix}-{number}',
+                    author_id=author_id,
+                )
+                for number, author_id in zip(batch, pick_author(len(batch)))
+            ]
+            with transaction.atomic():
+                last = Note.objects.order_by('-pk').values_list(
+                    'pk', flat=True
+                ).first() or 0
+                Note.objects.bulk_create(notes)
+                ids = dict(Note.objects.filter(pk__gt=last).values_list(
+                    'slug', 'pk'
+                ))
+                for note in notes:
+                    note.pk = ids[note.slug]
+                index_notes(connection, notes)
+        self.stdout.write(
+            f'{Note._meta.verbose_name_plural}: {count} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
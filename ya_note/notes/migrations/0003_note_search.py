@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from notes.search import index_notes
+
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+    terms,
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+
+def fill_index(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    notes = Note.objects.using(schema_editor.connection.alias).only(
+        'title', 'text', 'slug', 'author_id'
+    )
+    batch = []
+    for note in notes.iterator(chunk_size=2000):
+        batch.append(note)
+        if len(batch) == 2000:
+            index_notes(schema_editor.connection, batch)
+            batch = []
+    index_notes(schema_editor.connection, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, 'DROP TABLE notes_note_fts'),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,38 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
 
 from pytils.translit import slugify
 
+from .search import FTS_TABLE, build_match_query
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def search(self, author, text):
+        """
+        Заметки автора, подходящие под запрос, лучшие совпадения первыми.
+
+        Поиск идёт только по участку индекса этого автора, а условие
+        на автора лишь перепроверяет найденные строки.
+        """
+        query = build_match_query(author.pk, text)
+        queryset = self.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = notes_note.id',
+                f'{FTS_TABLE} MATCH %s',
+                # Унарный плюс не даёт SQLite взять индекс по автору
+                # и перебирать все его заметки, проверяя MATCH у каждой.
+                '+notes_note.author_id = %s',
+            ],
+            params=[query, author.pk],
+        ).annotate(
+            rank=RawSQL(f'bm25({FTS_TABLE})', (), output_field=FloatField())
+        ).order_by('rank', 'id')
+        return queryset if query else queryset.none()
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -28,6 +58,13 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
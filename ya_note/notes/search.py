@@ -0,0 +1,61 @@
+"""
+Полнотекстовый поиск по заметкам автора на FTS5.
+
+Каждое слово заметки попадает в индекс notes_note_fts с префиксом
+автора: слово «план» заметки пользователя 42 хранится как a42aплан.
+Термы индекса упорядочены, поэтому запрос a42aпла* читает только
+участок индекса этого автора и не касается чужих заметок, сколько
+бы их ни было. Индекс обновляется сигналами модели Note.
+"""
+import re
+
+FTS_TABLE = 'notes_note_fts'
+WORD = re.compile(r'[^\W_]+')
+
+
+def author_prefix(author_id):
+    return f'a{author_id}a'
+
+
+def words(text):
+    """Слова так, как их разбил бы токенизатор unicode61."""
+    return WORD.findall(text.lower().replace('ё', 'е'))
+
+
+def note_terms(note):
+    """Строка для индекса: слова заголовка, текста и адреса заметки."""
+    prefix = author_prefix(note.author_id)
+    return ' '.join(
+        prefix + word
+        for field in (note.title, note.text, note.slug)
+        for word in words(field)
+    )
+
+
+def build_match_query(author_id, text):
+    """
+    Выражение MATCH для поиска по мере ввода.
+
+    Все слова запроса обязательны и ищутся как префиксы,
+    чтобы недописанное последнее слово тоже находилось.
+    """
+    prefix = author_prefix(author_id)
+    return ' '.join(f'"{prefix}{word}"*' for word in words(text))
+
+
+def index_notes(connection, notes):
+    """Добавляет заметки в индекс или обновляет их."""
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, terms) '
+            'VALUES (%s, %s)',
+            [(note.pk, note_terms(note)) for note in notes],
+        )
+
+
+def unindex_notes(connection, ids):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk in ids],
+        )
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from yanote.auth_cache import forget_user
+
+from .models import Note
+from .search import index_notes, unindex_notes
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение SQLite по SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(post_save, sender=Note)
+def index_note(sender, instance, using, **kwargs):
+    """Обновляет заметку в поисковом индексе."""
+    index_notes(connections[using], [instance])
+
+
+@receiver(post_delete, sender=Note)
+def unindex_note(sender, instance, using, **kwargs):
+    unindex_notes(connections[using], [instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    """Изменённый пользователь больше не берётся из кеша."""
+    forget_user(instance.pk)
@@ -0,0 +1,62 @@
+"""
+Синтетические данные для нагрузочных проверок.
+
+Популярность неравномерна, как в жизни: немногие новости собирают
+большую часть комментариев, немногие авторы пишут большую часть
+текстов. Вес элемента номер k — 1 / k ** skew (закон Ципфа).
+"""
+import itertools
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'ту', 'не', 'ла', 'сто', 'при', 'вен', 'дом',
+    'пол', 'ёж', 'ри', 'ков', 'за', 'мет', 'ки', 'план', 'ус', 'бор',
+)
+
+
+def skewed_picker(items, skew, rng):
+    """Функция, возвращающая k случайных элементов items с весами Ципфа."""
+    items = list(items)
+    cum_weights = list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, len(items) + 1)
+    ))
+
+    def pick(k=1):
+        return rng.choices(items, cum_weights=cum_weights, k=k)
+
+    return pick
+
+
+class TextGenerator:
+    """Слова и фразы из набора слогов; словарь строится один раз."""
+
+    def __init__(self, rng, vocabulary=5000):
+        self.rng = rng
+        self.words = [
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(1, 4)))
+            for _ in range(vocabulary)
+        ]
+        self.pick_word = skewed_picker(self.words, 1.0, rng)
+
+    def phrase(self, min_words, max_words):
+        return ' '.join(
+            self.pick_word(self.rng.randint(min_words, max_words))
+        )
+
+    def title(self, max_length):
+        return self.phrase(2, 6).capitalize()[:max_length]
+
+    def text(self, sentences=3):
+        return ' '.join(
+            self.phrase(4, 14).capitalize() + '.'
+            for _ in range(self.rng.randint(1, sentences))
+        )
+
+
+def batched(iterable, size):
+    """Кортежи по size элементов; последний может быть короче."""
+    iterator = iter(iterable)
+    while True:
+        batch = tuple(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -33,8 +34,10 @@ class FixtureSetUpTestData(TestCase):
             author=cls.another_author,
         )
         cls.list_url = reverse('notes:list')
+        cls.search_url = reverse('notes:search')
         cls.done_url = reverse('notes:success')
         cls.add_url = reverse('notes:add')
+        cls.import_url = reverse('notes:import')
         cls.home_url = reverse('notes:home')
         cls.login_url = reverse('users:login')
         cls.logout_url = reverse('users:logout')
@@ -52,6 +55,10 @@ class FixtureSetUpTestData(TestCase):
             'slug': 'test',
         }
 
+    def setUp(self) -> None:
+        """Кеш не должен переживать тест, в отличие от базы."""
+        cache.clear()
+
     def get_note(self, id_note):
         """Метод получения заметки по id."""
         return Note.objects.get(id=id_note)
@@ -1,4 +1,13 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
 from .fixture import FixtureSetUpTestData
+from notes.models import Note
+
+CACHED_DB = 'django.contrib.sessions.backends.cached_db'
 
 
 class TestDetailPage(FixtureSetUpTestData):
@@ -14,6 +23,41 @@ class TestDetailPage(FixtureSetUpTestData):
         response = self.client_author.get(self.list_url)
         self.assertNotIn(self.note_another, response.context['object_list'])
 
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_list_keyset_pages(self) -> None:
+        """Тест на постраничный список заметок без текста."""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='текст', slug=f'n{index}',
+                 author=self.author)
+            for index in range(2)
+        )
+        first_page = self.client_author.get(self.list_url).context['page_obj']
+        self.assertTrue(first_page.has_next)
+        self.assertEqual(
+            first_page.object_list[0].get_deferred_fields(),
+            {'text', 'author_id'},
+        )
+        response = self.client_author.get(
+            self.list_url, {'after': first_page.next_cursor}
+        )
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.assertFalse(response.context['page_obj'].has_next)
+        previous_cursor = response.context['page_obj'].previous_cursor
+        response = self.client_author.get(
+            self.list_url, {'before': previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context['object_list']),
+            list(first_page.object_list),
+        )
+
+    def test_search_author_notes_by_prefix(self) -> None:
+        """Тест на поиск по началу слова только среди заметок автора."""
+        response = self.client_author.get(self.search_url, {'q': 'ЗАМ'})
+        self.assertEqual(list(response.context['object_list']), [self.note])
+        response = self.client_author.get(self.search_url, {'q': 'dan'})
+        self.assertEqual(list(response.context['object_list']), [])
+
     def test_authorized_client_has_form_create_update(self) -> None:
         """Тест на отображения формы создания и редактирования заметки."""
         for url, form in self.urls_forms:
@@ -21,3 +65,35 @@ class TestDetailPage(FixtureSetUpTestData):
                 response = self.client_author.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], form)
+
+    def test_cached_auth_saves_two_queries(self) -> None:
+        """Тест на сессию и пользователя из кеша: минус два запроса."""
+
+        def count_queries(url):
+            client = Client()
+            client.force_login(self.author)
+            client.get(url)
+            with CaptureQueriesContext(connection) as captured:
+                client.get(url)
+            return len(captured)
+
+        for url in (self.list_url, self.detail_url):
+            with self.subTest(url=url):
+                default = count_queries(url)
+                with override_settings(
+                    SESSION_ENGINE=CACHED_DB,
+                    AUTH_USER_CACHE_ENABLED=True,
+                ):
+                    self.assertEqual(count_queries(url), default - 2)
+
+    @override_settings(AUTH_USER_CACHE_ENABLED=True)
+    def test_cached_user_forgotten_on_change(self) -> None:
+        """Тест на сброс пользователя в кеше при смене пароля."""
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(client.get(self.list_url).status_code, HTTPStatus.OK)
+        self.author.set_password('новый пароль')
+        self.author.save()
+        self.assertEqual(
+            client.get(self.list_url).status_code, HTTPStatus.FOUND
+        )
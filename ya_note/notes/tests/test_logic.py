@@ -1,10 +1,24 @@
+import gzip
+import io
+import json
+import tempfile
+import zipfile
 from http import HTTPStatus
+from pathlib import Path
+from unittest import mock
 
 from django.contrib.auth import get_user
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.forms import WARNING
+from notes import importer
+from notes.importer import import_notes, parse_notes
 from .fixture import FixtureSetUpTestData
+from notes import urls
 from notes.models import Note
 
 
@@ -21,6 +35,22 @@ class TestNoteCreation(FixtureSetUpTestData):
         expected_slug = slugify(self.form_data['title'])
         assert new_note.slug == expected_slug
 
+    @override_settings(THROTTLE_RATES={'note': {'user': '1/m'}})
+    def test_create_throttled_per_user(self) -> None:
+        """Тест на 429 сверх лимита до проверки формы."""
+        Note.objects.all().delete()
+        self.client_author.post(self.add_url, data=self.form_data)
+        response = self.client_author.post(
+            self.add_url, data={**self.form_data, 'slug': 'second'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Note.objects.count(), self.ONE_NOTE)
+        response = self.another_author_client.post(
+            self.add_url, data={**self.form_data, 'slug': 'third'}
+        )
+        self.assertRedirects(response, self.done_url)
+
     def test_anonymous_user_cant_create_note(self) -> None:
         """Тест на создания заметки анонимным пользователем."""
         later_count_notes: int = Note.objects.count()
@@ -42,6 +72,235 @@ class TestNoteCreation(FixtureSetUpTestData):
         self.assertEqual(note.author, get_user(self.client_author))
 
 
+class TestNoteImport(FixtureSetUpTestData):
+    FILES = (
+        (
+            'notes.json',
+            '[{"title": "Покупки", "text": "Хлеб", "slug": "shop"},'
+            ' {"title": "Hello", "text": "Ещё одна"}]',
+        ),
+        ('notes.csv', 'title,text,slug\nПокупки,Хлеб,shop\nHello,Ещё,'),
+        (
+            'notes.md',
+            '# Покупки {#shop}\nХлеб\n\n# Hello\nЕщё одна\n',
+        ),
+    )
+
+    def test_import_formats(self) -> None:
+        """Тест на импорт из JSON, CSV и Markdown с подбором slug."""
+        for name, content in self.FILES:
+            with self.subTest(name=name):
+                Note.objects.filter(author=self.another_author).delete()
+                response = self.another_author_client.post(
+                    self.import_url,
+                    {'file': SimpleUploadedFile(name, content.encode())},
+                )
+                self.assertEqual(response.context['result'].created, 2)
+                self.assertEqual(
+                    set(Note.objects.filter(
+                        author=self.another_author
+                    ).values_list('slug', flat=True)),
+                    {'shop', self.note.slug + '-2'},
+                )
+                self.assertTrue(Note.objects.search(
+                    self.another_author, 'покуп'
+                ).exists())
+
+    def test_import_reports_errors_per_row(self) -> None:
+        """Тест на построчные ошибки, как у формы заметки."""
+        rows = [
+            {'title': 'Повтор', 'text': 'Текст', 'slug': self.note.slug},
+            {'title': '', 'text': 'Без заголовка'},
+            {'title': 'Новая', 'text': 'Текст', 'slug': 'new'},
+            {'title': 'Ещё раз', 'text': 'Текст', 'slug': 'new'},
+        ]
+        result = import_notes(self.author, rows)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            [row for row, _ in result.errors], [1, 2, 4]
+        )
+        self.assertEqual(result.errors[0][1], self.note.slug + WARNING)
+        self.assertEqual(result.errors[2][1], 'new' + WARNING)
+
+    def test_import_same_titles_resume_suffixes(self) -> None:
+        """Тест на суффиксы одинаковых заголовков с пропуском занятых."""
+        Note.objects.create(
+            title='Дубль', text='Текст', slug='dubl-3', author=self.author
+        )
+        rows = [{'title': 'Дубль', 'text': 'Текст'}] * 4
+        self.assertEqual(import_notes(self.author, rows).created, 4)
+        self.assertEqual(
+            set(Note.objects.filter(title='Дубль').values_list(
+                'slug', flat=True
+            )),
+            {'dubl', 'dubl-2', 'dubl-3', 'dubl-4', 'dubl-5'},
+        )
+
+    def test_import_reports_slug_taken_concurrently(self) -> None:
+        """Тест на slug, занятый другим запросом после проверки."""
+        build_notes = importer.build_notes
+
+        def build_then_take(*args):
+            notes = build_notes(*args)
+            Note.objects.create(
+                title='Параллельно',
+                text='Текст',
+                slug='race',
+                author=self.another_author,
+            )
+            return notes
+
+        rows = [
+            {'title': 'Первая', 'text': 'Текст', 'slug': 'race'},
+            {'title': 'Вторая', 'text': 'Текст', 'slug': 'calm'},
+        ]
+        with mock.patch.object(importer, 'build_notes', build_then_take):
+            result = import_notes(self.author, rows)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [(1, 'race' + WARNING)])
+        self.assertTrue(Note.objects.filter(slug='calm').exists())
+
+    def test_parse_markdown_without_slug(self) -> None:
+        """Тест на разбор Markdown: текст до следующего заголовка."""
+        rows = parse_notes('notes.md', '# Один\nа\nб\n# Два\n'.encode())
+        self.assertEqual(rows, [
+            {'title': 'Один', 'slug': '', 'text': 'а\nб'},
+            {'title': 'Два', 'slug': '', 'text': ''},
+        ])
+
+
+@override_settings(NOTES_EXPORT_CHUNK_SIZE=2)
+class TestNoteExport(FixtureSetUpTestData):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text=f'Текст {index}',
+                 slug=f'note-{index}', author=cls.author)
+            for index in range(4)
+        )
+        cls.expected = list(Note.objects.filter(
+            author=cls.author
+        ).order_by('id').values('title', 'text', 'slug'))
+
+    def test_export_zip_reads_back_as_markdown(self) -> None:
+        """Тест на выгрузку в zip: по файлу Markdown на заметку."""
+        response = self.client_author.get(reverse('notes:export_zip'))
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        self.assertEqual(
+            archive.namelist(),
+            [f'{note["slug"]}.md' for note in self.expected],
+        )
+        rows = parse_notes('notes.md', b''.join(
+            archive.read(name) for name in archive.namelist()
+        ))
+        self.assertEqual(rows, self.expected)
+
+    def test_export_ndjson_gz(self) -> None:
+        """Тест на выгрузку в NDJSON, сжатый gzip."""
+        response = self.client_author.get(reverse('notes:export_ndjson'))
+        content = gzip.decompress(b''.join(response.streaming_content))
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows, self.expected)
+
+    def test_export_command_writes_file_per_user(self) -> None:
+        """Тест на выгрузку всех пользователей командой."""
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                'export_notes', output_dir=directory, format='ndjson',
+                stdout=io.StringIO(),
+            )
+            self.assertEqual(
+                sorted(path.name for path in Path(directory).iterdir()),
+                ['Danil.ndjson.gz', 'warfolomey.ndjson.gz'],
+            )
+
+
+class TestSeedData(FixtureSetUpTestData):
+
+    def test_seed_data_and_load_report(self) -> None:
+        """Тест на генерацию данных и отчёт нагрузки по notes.urls."""
+        call_command(
+            'seed_data', users=3, notes=40, seed=1, batch_size=7,
+            stdout=io.StringIO(),
+        )
+        seeded = Note.objects.filter(slug__startswith='seed-')
+        self.assertEqual(seeded.count(), 40)
+        note = seeded.last()
+        self.assertTrue(Note.objects.search(
+            note.author, note.title.split()[0]
+        ).filter(pk=note.pk).exists())
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'report.json'
+            call_command(
+                'bench_load', requests=40, warmup=5, seed=1,
+                output=str(output),
+            )
+            report = json.loads(output.read_text())
+        self.assertEqual(report['requests'], 40)
+        names = {f'notes:{pattern.name}' for pattern in urls.urlpatterns}
+        self.assertLessEqual(
+            {route.split()[1] for route in report['routes']}, names
+        )
+
+
+class TestNoteBatch(FixtureSetUpTestData):
+
+    def post_batch(self, client, operations):
+        return client.post(
+            reverse('notes:api_batch'),
+            json.dumps({'operations': operations}),
+            content_type='application/json',
+        )
+
+    def test_batch_applies_operations_with_form_rules(self) -> None:
+        """Тест на пакет операций с построчными результатами."""
+        response = self.post_batch(self.client_author, [
+            {'op': 'create', 'data': self.form_data},
+            {'op': 'create', 'data': {**self.form_data, 'slug': 'danil'}},
+            {'op': 'update', 'slug': self.note.slug, 'data': {'title': 'Н'}},
+            {'op': 'update', 'slug': self.note_another.slug, 'data': {}},
+            {'op': 'delete', 'slug': self.form_data['slug']},
+            {'op': 'rename'},
+        ])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        results = response.json()['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            [201, 400, 200, 404, 204, 400],
+        )
+        self.assertEqual(
+            results[1]['errors']['slug'][0]['message'], 'danil' + WARNING
+        )
+        note = self.get_note(self.note.id)
+        self.assertEqual(note.title, 'Н')
+        self.assertEqual(note.text, self.note.text)
+        self.assertFalse(
+            Note.objects.filter(slug=self.form_data['slug']).exists()
+        )
+
+    @override_settings(NOTES_API_BATCH_LIMIT=1)
+    def test_batch_limit(self) -> None:
+        """Тест на ограничение размера пакета."""
+        operations = [{'op': 'create', 'data': self.form_data}] * 2
+        response = self.post_batch(self.client_author, operations)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(
+            Note.objects.filter(slug=self.form_data['slug']).exists()
+        )
+
+    def test_anonymous_user_cant_use_batch(self) -> None:
+        """Тест на запрет пакетных операций анонимному пользователю."""
+        response = self.post_batch(
+            self.client, [{'op': 'delete', 'slug': self.note.slug}]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
 class TestNoteEditDelete(FixtureSetUpTestData):
 
     def test_author_can_delete_note(self) -> None:
@@ -60,6 +319,16 @@ class TestNoteEditDelete(FixtureSetUpTestData):
         notes_count: int = Note.objects.count()
         self.assertEqual(notes_count, later_notes_count)
 
+    def test_search_index_follows_edit_and_delete(self) -> None:
+        """Тест на обновление поискового индекса при правке и удалении."""
+        self.client_author.post(self.update_url, data=self.form_data)
+        self.assertFalse(Note.objects.search(self.author, 'топ').exists())
+        self.assertTrue(Note.objects.search(self.author, 'tes').exists())
+        self.client_author.delete(
+            reverse('notes:delete', args=(self.form_data['slug'],))
+        )
+        self.assertFalse(Note.objects.search(self.author, 'tes').exists())
+
     def test_author_can_edit_note(self) -> None:
         """Тест на редактирования автором заметки."""
         response = self.client_author.post(
@@ -0,0 +1,89 @@
+import re
+
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .fixture import FixtureSetUpTestData
+from notes.models import Note
+from notes.views import NoteBase
+
+BAD_PLAN = re.compile(r'^SCAN (TABLE )?\w+$|TEMP B-TREE')
+
+
+class TestQueryPlans(FixtureSetUpTestData):
+
+    def assert_plans_use_indexes(self, queries):
+        """Запросы не должны просматривать таблицу целиком или сортировать."""
+        selects = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                steps = [row[-1] for row in cursor.fetchall()]
+            with self.subTest(sql=sql):
+                self.assertEqual(
+                    [step for step in steps if BAD_PLAN.search(step)], []
+                )
+
+    def test_note_base_queryset_plan(self) -> None:
+        """Тест плана выборки заметок пользователя."""
+        view = NoteBase()
+        view.request = RequestFactory().get('/')
+        view.request.user = self.author
+        with CaptureQueriesContext(connection) as captured:
+            list(view.get_queryset())
+        self.assert_plans_use_indexes(captured.captured_queries)
+
+    def test_note_views_plans(self) -> None:
+        """Тест планов запросов страниц заметок."""
+        for url in (
+            self.list_url,
+            self.detail_url,
+            self.update_url,
+            self.delete_url,
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as captured:
+                    self.client_author.get(url)
+                self.assert_plans_use_indexes(captured.captured_queries)
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=1)
+    def test_list_pages_plans(self) -> None:
+        """Тест планов запросов следующей и предыдущей страниц списка."""
+        Note.objects.create(title='Вторая', text='текст', author=self.author)
+        page = self.client_author.get(self.list_url).context['page_obj']
+        with CaptureQueriesContext(connection) as captured:
+            page = self.client_author.get(
+                self.list_url, {'after': page.next_cursor}
+            ).context['page_obj']
+            self.client_author.get(
+                self.list_url, {'before': page.previous_cursor}
+            )
+        self.assert_plans_use_indexes(captured.captured_queries)
+
+    def test_search_plan(self) -> None:
+        """
+        Тест плана поиска: совпадения берутся из индекса FTS5.
+
+        Сортируются только найденные заметки автора по bm25.
+        """
+        with CaptureQueriesContext(connection) as captured:
+            self.client_author.get(self.search_url, {'q': 'зам'})
+        sql = next(
+            query['sql'] for query in captured.captured_queries
+            if 'MATCH' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            steps = [row[-1] for row in cursor.fetchall()]
+        # Заметки ищутся по найденным в индексе rowid, а не наоборот.
+        self.assertTrue(
+            any('VIRTUAL TABLE INDEX 0:M' in step for step in steps), steps
+        )
+        self.assertFalse(
+            any(re.match(r'SCAN (TABLE )?notes_note$', s) for s in steps)
+        )
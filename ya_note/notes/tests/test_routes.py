@@ -1,6 +1,14 @@
 from http import HTTPStatus
 
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
 from .fixture import FixtureSetUpTestData
+from notes.models import Note
+from yanote.db_router import (
+    PIN_COOKIE, PrimaryReplicaRouter, primary_pin_middleware
+)
 
 
 class TestRoutes(FixtureSetUpTestData):
@@ -13,8 +21,10 @@ class TestRoutes(FixtureSetUpTestData):
             (self.logout_url, self.client),
             (self.signup_url, self.client),
             (self.list_url, self.client_author),
+            (self.search_url, self.client_author),
             (self.done_url, self.client_author),
             (self.add_url, self.client_author),
+            (self.import_url, self.client_author),
             (self.update_url, self.client_author),
             (self.delete_url, self.client_author),
             (self.detail_url, self.client_author),
@@ -28,8 +38,10 @@ class TestRoutes(FixtureSetUpTestData):
         """Перенаправления анонимного пользователя на вход."""
         urls: list = [
             self.list_url,
+            self.search_url,
             self.done_url,
             self.add_url,
+            self.import_url,
             self.delete_url,
             self.detail_url,
             self.update_url,
@@ -63,3 +75,24 @@ class TestRoutes(FixtureSetUpTestData):
             with self.subTest(url=url, status=status, client=client):
                 response = client.get(url)
                 self.assertEqual(response.status_code, status)
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_reads_stick_to_primary_after_write(self) -> None:
+        """Тест на чтение из основной базы сразу после записи."""
+        router = PrimaryReplicaRouter()
+        middleware = primary_pin_middleware(
+            lambda request: HttpResponse(router.db_for_read(Note))
+        )
+        factory = RequestFactory()
+        self.assertEqual(middleware(factory.get('/')).content, b'replica_1')
+        response = middleware(factory.post('/'))
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(router.db_for_write(Note), 'default')
+        request = factory.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.assertEqual(middleware(request).content, b'default')
+
+    def test_primary_pin_skipped_without_replicas(self) -> None:
+        """Тест на отключение закрепления, когда реплик нет."""
+        with self.assertRaises(MiddlewareNotUsed):
+            primary_pin_middleware(lambda request: HttpResponse())
@@ -0,0 +1,87 @@
+"""
+Ограничение частоты записей: корзина токенов на пользователя и на IP.
+
+Корзина вмещает N токенов и наполняется на N за период, так что
+короткий всплеск до N запросов проходит, а поток сверх средней
+скорости получает 429 ещё до проверки формы и записи в базу.
+Состояние корзин хранится в кеше THROTTLE_CACHE: чтобы лимит был
+общим для нескольких процессов, туда нужен общий кеш, например
+FileBasedCache (см. YANOTE_THROTTLE_CACHE_DIR в настройках).
+Чтение и запись корзины не атомарны, поэтому при одновременных
+запросах лимит может быть превышен на число процессов.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): ёмкость корзины и период её наполнения."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBucket:
+
+    def __init__(self, key, rate):
+        self.key = key
+        self.capacity, self.period = parse_rate(rate)
+
+    def take(self, now=None):
+        """Забирает токен; возвращает 0 или сколько секунд ждать."""
+        cache = caches[settings.THROTTLE_CACHE]
+        now = time.time() if now is None else now
+        refill = self.capacity / self.period
+        tokens, stamp = cache.get(self.key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - stamp) * refill)
+        if tokens < 1:
+            return (1 - tokens) / refill
+        # Через период простоя корзина всё равно полна: запись не нужна.
+        cache.set(self.key, (tokens - 1, now), self.period)
+        return 0
+
+
+class ThrottleMixin:
+    """
+    Отвечает 429 на запросы сверх THROTTLE_RATES[throttle_scope].
+
+    Ставится первым в списке родителей, чтобы отказ происходил
+    до загрузки объектов и обработки формы.
+    """
+    throttle_scope = None
+    throttle_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.throttle_methods:
+            for bucket in self.get_throttle_buckets(request):
+                wait = bucket.take()
+                if wait:
+                    return self.throttled(wait)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_throttle_buckets(self, request):
+        rates = settings.THROTTLE_RATES.get(self.throttle_scope, {})
+        prefix = f'throttle:{self.throttle_scope}'
+        if rates.get('user') and request.user.is_authenticated:
+            yield TokenBucket(
+                f'{prefix}:user:{request.user.pk}', rates['user']
+            )
+        if rates.get('ip'):
+            yield TokenBucket(
+                f'{prefix}:ip:{request.META.get("REMOTE_ADDR")}',
+                rates['ip'],
+            )
+
+    def throttled(self, wait):
+        response = HttpResponse(
+            'Слишком много запросов, попробуйте позже.',
+            status=429,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = math.ceil(wait)
+        return response
@@ -7,9 +7,22 @@ app_name = 'notes'
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
+    path('import/', views.NoteImport.as_view(), name='import'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/search/', views.NoteSearch.as_view(), name='search'),
+    path('api/notes/batch/', views.NoteBatch.as_view(), name='api_batch'),
+    path(
+        'export/notes.zip',
+        views.NoteExport.as_view(export_format='zip'),
+        name='export_zip',
+    ),
+    path(
+        'export/notes.ndjson.gz',
+        views.NoteExport.as_view(export_format='ndjson'),
+        name='export_ndjson',
+    ),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
@@ -1,9 +1,21 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.forms.models import model_to_dict
+from django.http import JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from yanote.query_budget import expect_repeats
+
+from .exporter import FORMATS, export_notes
+from .forms import WARNING, NoteForm, NoteUploadForm
+from .importer import ImportFormatError, import_notes, parse_notes
 from .models import Note
+from .pagination import KeysetPaginator
+from .throttle import ThrottleMixin
 
 
 class Home(generic.TemplateView):
@@ -14,27 +26,29 @@ class Home(generic.TemplateView):
 class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     """Страница успешного выполнения операции."""
     template_name = 'notes/success.html'
+    query_budget = 2
 
 
 class NoteBase(LoginRequiredMixin):
     """Базовый класс для остальных CBV."""
     model = Note
     success_url = reverse_lazy('notes:success')
+    # Запись заметки включает обновление поискового индекса.
+    query_budget = 6
 
     def get_queryset(self):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
+class NoteCreate(ThrottleMixin, NoteBase, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
+    throttle_scope = 'note'
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -52,8 +66,191 @@ class NoteDelete(NoteBase, generic.DeleteView):
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    list_fields = ('id', 'slug', 'title')
+    keyset_ordering = ('id',)
+    query_budget = 4
+
+    def get_queryset(self):
+        """
+        Только поля, которые выводит список: текст заметок не читается.
+
+        Страницы отсчитываются от последнего id по индексу
+        (author, id), поэтому любая страница списка стоит одинаково
+        при десяти заметках и при сотне тысяч.
+        """
+        return super().get_queryset().only(*self.list_fields)
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_COUNT_ON_LIST_PAGE
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.keyset_ordering, page_size)
+        page = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class NoteSearch(NotesList):
+    """Поиск по заметкам пользователя по мере ввода."""
+    query_budget = 3
+
+    def get_queryset(self):
+        return self.model.objects.search(
+            self.request.user, self.request.GET.get('q', '')
+        ).only(*self.list_fields)[:settings.NOTES_SEARCH_RESULTS]
+
+    def get_paginate_by(self, queryset):
+        return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteImport(LoginRequiredMixin, generic.FormView):
+    """Загрузка заметок из файла JSON, CSV или Markdown."""
+    template_name = 'notes/import.html'
+    form_class = NoteUploadForm
+    query_budget = {'GET': 2, 'POST': 7}
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        try:
+            rows = parse_notes(upload.name, upload.read())
+        except ImportFormatError as error:
+            form.add_error('file', str(error))
+            return self.form_invalid(form)
+        result = import_notes(self.request.user, rows)
+        return self.render_to_response(
+            self.get_context_data(form=form, result=result)
+        )
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """
+    Скачивание всех заметок пользователя одним архивом.
+
+    Архив собирается по ходу отдачи ответа из пачек заметок,
+    поэтому память не зависит от того, сколько их у пользователя.
+    """
+    export_format = 'zip'
+    query_budget = 2
+
+    def get(self, request, *args, **kwargs):
+        _, content_type, filename = FORMATS[self.export_format]
+        response = StreamingHttpResponse(
+            export_notes(request.user, self.export_format),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
 
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    query_budget = 3
+
+
+class NoteBatch(NoteBase, generic.View):
+    """
+    JSON API: пакет операций create, update и delete над заметками.
+
+    Тело запроса — {"operations": [...]}, не больше
+    NOTES_API_BATCH_LIMIT операций. Весь пакет выполняется в одной
+    транзакции, каждая операция — в своей точке сохранения, поэтому
+    ошибка в одной операции не отменяет остальные. Проверки те же,
+    что у HTML-форм: NoteForm и заметки только текущего пользователя.
+    """
+    http_method_names = ['post']
+    raise_exception = True
+    fields = ('title', 'text', 'slug')
+    query_budget = 6
+
+    def post(self, request, *args, **kwargs):
+        try:
+            operations = json.loads(request.body)['operations']
+        except (ValueError, KeyError, TypeError):
+            return self.error('Ожидается JSON вида {"operations": [...]}.')
+        if not isinstance(operations, list):
+            return self.error('operations должен быть списком.')
+        if len(operations) > settings.NOTES_API_BATCH_LIMIT:
+            return self.error(
+                'Не больше '
+                f'{settings.NOTES_API_BATCH_LIMIT} операций в одном запросе.'
+            )
+        expect_repeats(request, len(operations))
+        results = []
+        with transaction.atomic():
+            for operation in operations:
+                with transaction.atomic():
+                    result = self.apply(operation)
+                    if result['status'] >= 400:
+                        transaction.set_rollback(True)
+                results.append(result)
+        return JsonResponse({'results': results})
+
+    def error(self, message):
+        return JsonResponse({'error': message}, status=400)
+
+    def apply(self, operation):
+        if not isinstance(operation, dict):
+            return {'status': 400, 'error': 'Операция должна быть объектом.'}
+        handler = getattr(self, f'apply_{operation.get("op")}', None)
+        if handler is None:
+            return {
+                'status': 400,
+                'error': 'op должен быть create, update или delete.',
+            }
+        return handler(operation)
+
+    def get_note(self, operation):
+        return self.get_queryset().filter(slug=operation.get('slug')).first()
+
+    def get_data(self, operation):
+        data = operation.get('data')
+        return data if isinstance(data, dict) else {}
+
+    def apply_create(self, operation):
+        form = NoteForm(data=self.get_data(operation))
+        form.instance.author = self.request.user
+        return self.save(form, status=201)
+
+    def apply_update(self, operation):
+        note = self.get_note(operation)
+        if note is None:
+            return {'status': 404, 'slug': operation.get('slug')}
+        # Поля, которых нет в операции, остаются прежними.
+        data = {
+            **model_to_dict(note, self.fields),
+            **self.get_data(operation),
+        }
+        return self.save(NoteForm(data=data, instance=note), status=200)
+
+    def apply_delete(self, operation):
+        note = self.get_note(operation)
+        if note is None:
+            return {'status': 404, 'slug': operation.get('slug')}
+        note.delete()
+        return {'status': 204, 'slug': note.slug}
+
+    def save(self, form, status):
+        if not form.is_valid():
+            return {'status': 400, 'errors': form.errors.get_json_data()}
+        try:
+            note = form.save()
+        except IntegrityError:
+            # slug заняли параллельным запросом после проверки формы.
+            slug = form.cleaned_data['slug']
+            return {'status': 400, 'errors': {'slug': [
+                {'message': slug + WARNING, 'code': 'unique'}
+            ]}}
+        return {
+            'status': status,
+            'note': {'id': note.pk, **model_to_dict(note, self.fields)},
+        }
@@ -0,0 +1,85 @@
+"""
+Пользователь из кеша вместо запроса к auth_user на каждый запрос.
+
+Включается вместе с сессиями без базы:
+
+    YANOTE_SESSION_ENGINE=cached_db python manage.py runserver
+
+С cached_db сессия читается из кеша, с signed_cookies — из cookie,
+а пользователь хранится в кеше AUTH_USER_CACHE_TIMEOUT секунд.
+Сохранение и удаление пользователя сбрасывают запись сразу,
+а короткий срок жизни страхует процессы с локальным кешем
+(LocMemCache) и изменения в обход save(). С локальным кешем
+в нескольких процессах надёжнее signed_cookies: у cached_db выход
+в одном процессе не виден в кеше сессий другого.
+"""
+import asyncio
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def get_cached_user(request):
+    """
+    То же, что auth.get_user, но пользователь берётся из кеша.
+
+    Хеш пароля в сессии сверяется и с закешированным пользователем,
+    поэтому смена пароля по-прежнему завершает другие сессии.
+    """
+    user_id = request.session.get(auth.SESSION_KEY)
+    backend = request.session.get(auth.BACKEND_SESSION_KEY)
+    if user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if not (
+        session_hash
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    ):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+@sync_and_async_middleware
+def cached_user_middleware(get_response):
+    """
+    Ставится после AuthenticationMiddleware и заменяет request.user.
+
+    Пользователь загружается лениво, уже в потоке вью.
+    """
+    if not settings.AUTH_USER_CACHE_ENABLED:
+        raise MiddlewareNotUsed
+
+    def set_user(request):
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            set_user(request)
+            return await get_response(request)
+    else:
+        def middleware(request):
+            set_user(request)
+            return get_response(request)
+    return middleware
@@ -0,0 +1,104 @@
+"""
+Чтение с реплик, запись в основную базу.
+
+Локально реплику можно заменить копией файла SQLite:
+
+    cp db.sqlite3 replica.sqlite3
+    YANOTE_REPLICA_DBS=replica.sqlite3 python manage.py runserver
+"""
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+PIN_COOKIE = 'primary_pin'
+PIN_SALT = 'yanote.db_router'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_use_primary = ContextVar('use_primary', default=False)
+
+
+@contextmanager
+def use_primary(enabled=True):
+    """Все чтения внутри блока идут в основную базу."""
+    token = _use_primary.set(enabled)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _use_primary.get():
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def is_pinned(request):
+    """Небезопасный запрос или свежая cookie после записи."""
+    if request.method not in SAFE_METHODS:
+        return True
+    return request.get_signed_cookie(
+        PIN_COOKIE,
+        default=None,
+        salt=PIN_SALT,
+        max_age=settings.PRIMARY_PIN_SECONDS,
+    ) is not None
+
+
+def pin(request, response):
+    if request.method not in SAFE_METHODS:
+        response.set_signed_cookie(
+            PIN_COOKIE,
+            '1',
+            salt=PIN_SALT,
+            max_age=settings.PRIMARY_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
+    return response
+
+
+@sync_and_async_middleware
+def primary_pin_middleware(get_response):
+    """
+    Read-your-writes: после записи пользователь читает из основной базы.
+
+    Любой небезопасный запрос (заметка, вход) целиком
+    выполняется на основной базе и ставит подписанную cookie,
+    которая на PRIMARY_PIN_SECONDS оставляет пользователя на ней,
+    пока реплика догоняет.
+
+    Без реплик читать и так больше неоткуда, и промежуточное ПО
+    не подключается. Под ASGI оно работает асинхронно: контекст
+    с use_primary переходит в потоки sync_to_async.
+    """
+    if not settings.DATABASE_REPLICAS:
+        raise MiddlewareNotUsed
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            with use_primary(is_pinned(request)):
+                response = await get_response(request)
+            return pin(request, response)
+    else:
+        def middleware(request):
+            with use_primary(is_pinned(request)):
+                response = get_response(request)
+            return pin(request, response)
+    return middleware
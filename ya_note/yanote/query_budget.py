@@ -0,0 +1,133 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+budget_exceeded = Signal()
+
+IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+# Управление транзакцией: под pytest atomic() даёт SAVEPOINT, а в
+# обычном режиме autocommit — BEGIN, и бюджет не должен их различать.
+IGNORED = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def fingerprint(sql):
+    """SQL без значений: списки IN разной длины считаются одним запросом."""
+    return IN_LIST.sub('(%s)', ' '.join(sql.split()))
+
+
+@dataclass
+class QueryReport:
+    """Статистика запросов к базе за один HTTP-запрос."""
+    url_name: str
+    method: str
+    budget: Optional[int] = None
+    repeat: int = 1
+    count: int = 0
+    duration: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(IGNORED):
+                self.count += 1
+                self.duration += time.perf_counter() - started
+                self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return {
+            sql: n for sql, n in self.fingerprints.items() if n > self.repeat
+        }
+
+    @property
+    def over_budget(self):
+        return (
+            self.budget is not None
+            and self.count > self.budget * self.repeat
+        )
+
+    def __str__(self):
+        lines = [
+            f'{self.method} {self.url_name}: {self.count} запросов '
+            f'(бюджет {self.budget}), {self.duration * 1000:.1f} мс'
+        ]
+        lines.extend(
+            f'  повторён {n} раз: {sql}'
+            for sql, n in self.duplicates.items()
+        )
+        return '\n'.join(lines)
+
+
+def get_query_budget(view_func, method):
+    """
+    Бюджет запросов, объявленный во вью атрибутом query_budget.
+
+    Атрибут может быть числом или словарём {'GET': 3, 'POST': 5}.
+    """
+    view = getattr(view_func, 'view_class', view_func)
+    budget = getattr(view, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(method)
+    return budget
+
+
+def expect_repeats(request, times):
+    """
+    Отмечает пакетный запрос из times однотипных операций.
+
+    Бюджет вью тогда считается на одну операцию, а запрос
+    повторяющимся — только если он выполнен больше times раз.
+    """
+    report = getattr(request, 'query_report', None)
+    if report is not None:
+        report.repeat = max(times, 1)
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает запросы к базе для каждого вью и сверяет их с бюджетом.
+
+    Превышение бюджета и повторяющиеся запросы пишутся в лог
+    в режиме отладки и рассылаются сигналом budget_exceeded,
+    на который подписан плагин pytest.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        report = QueryReport(url_name=request.path, method=request.method)
+        request.query_report = report
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(report))
+            response = self.get_response(request)
+        logger.debug('%s', report)
+        if report.over_budget or report.duplicates:
+            if settings.DEBUG:
+                logger.warning('%s', report)
+            budget_exceeded.send(
+                sender=self.__class__, request=request, report=report
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        report = request.query_report
+        report.url_name = request.resolver_match.view_name
+        report.budget = get_query_budget(view_func, request.method)
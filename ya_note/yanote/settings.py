@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -23,10 +24,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yanote.query_budget.QueryBudgetMiddleware',
+    'yanote.db_router.primary_pin_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanote.auth_cache.cached_user_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,6 +63,72 @@ DATABASES = {
     }
 }
 
+DATABASE_REPLICAS = []
+
+for index, name in enumerate(
+    filter(None, os.getenv('YANOTE_REPLICA_DBS', '').split(',')), 1
+):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['yanote.db_router.PrimaryReplicaRouter']
+
+PRIMARY_PIN_SECONDS = 10
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PRAGMAS = {}
+
+if os.getenv('YANOTE_DB_PROFILE') == 'production':
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yanote',
+    }
+}
+
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+AUTH_USER_CACHE_ENABLED = False
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
+if os.getenv('YANOTE_SESSION_ENGINE') in SESSION_ENGINES:
+    SESSION_ENGINE = SESSION_ENGINES[os.getenv('YANOTE_SESSION_ENGINE')]
+    AUTH_USER_CACHE_ENABLED = True
+
+# Корзины токенов для записей: ёмкость/период на пользователя и на IP.
+THROTTLE_RATES = {
+    'note': {'user': '30/m', 'ip': '120/m'},
+}
+
+THROTTLE_CACHE = 'default'
+
+if os.getenv('YANOTE_THROTTLE_CACHE_DIR'):
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('YANOTE_THROTTLE_CACHE_DIR'),
+    }
+    THROTTLE_CACHE = 'throttle'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +157,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+QUERY_BUDGET_ENABLED = DEBUG
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+
+NOTES_SEARCH_RESULTS = 20
+
+NOTES_API_BATCH_LIMIT = 500
+
+NOTES_EXPORT_CHUNK_SIZE = 2000